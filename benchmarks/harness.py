@@ -0,0 +1,28 @@
+"""Timing helpers shared by the benchmarks in this directory.
+
+Each benchmark measures the tree containing it, and only uses interfaces which predate the
+change it covers, so the effect of a change is measured by running the benchmark once on
+the change and once on its parent, for example::
+
+    git worktree add /tmp/before <commit>~1
+    cp benchmarks/*.py /tmp/before/benchmarks/
+    python /tmp/before/benchmarks/cloning.py
+    python benchmarks/cloning.py
+
+Every measurement reports the best of several repeats, as timings on a busy machine only
+ever err upwards.
+"""
+
+import os
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def measure(label, function, number, repeats=15):
+    """Runs ``function`` ``number`` times, ``repeats`` times over, and reports the best
+    total time taken, in seconds."""
+
+    best = min(repeat(function, number=number, repeat=repeats))
+    sys.stdout.write('%-48s %9.4fs  (%d calls, best of %d)\n' % (label, best, number, repeats))
+    return best
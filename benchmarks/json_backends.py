@@ -0,0 +1,51 @@
+"""Measures serializing and unserializing representative payloads with the Json format,
+once for each json backend which can be selected, and once with the default selection.
+Trees without backend selection are measured with their default only."""
+
+from datetime import datetime
+import sys
+
+from harness import measure
+
+from scheme import Integer, Structure, Text
+from scheme.formats import Json
+
+BACKENDS = ['simplejson', 'json', 'scheme.json']
+
+def construct_record(i):
+    return {'id': i, 'name': u'record %d' % i, 'active': bool(i % 2), 'score': i * 1.5,
+        'amount': i + 0.25, 'tags': [u'alpha', u'beta', u'\xe9'],
+        'created': datetime(2000, 1, 1).isoformat(), 'parent': None,
+        'attributes': {'color': u'red', 'size': i % 7, 'weight': 0.5}}
+
+def construct_payloads():
+    schema = Structure(dict(('field%d' % i, Integer(minimum=0) if i % 2 else Text(max_length=8))
+        for i in range(200)))
+    return [
+        ('record', construct_record(1), 2000),
+        ('500 records', [construct_record(i) for i in range(500)], 20),
+        ('200-field schema', schema.describe(), 20),
+    ]
+
+def measure_backend(label, payloads):
+    for name, payload, number in payloads:
+        serialized = Json.serialize(payload)
+        if isinstance(serialized, str):
+            serialized = serialized.decode('utf8')
+        measure('%s: serialize %s' % (label, name), lambda: Json.serialize(payload), number)
+        measure('%s: unserialize %s' % (label, name), lambda: Json.unserialize(serialized), number)
+
+if __name__ == '__main__':
+    payloads = construct_payloads()
+    measure_backend('default', payloads)
+
+    select_backend = getattr(Json, 'select_backend', None)
+    if select_backend:
+        for backend in BACKENDS:
+            try:
+                select_backend(backend)
+            except (ImportError, ValueError) as exception:
+                sys.stdout.write('%s: skipped (%s)\n' % (backend, exception))
+                continue
+            measure_backend(backend, payloads)
+        select_backend()
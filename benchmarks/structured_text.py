@@ -0,0 +1,23 @@
+"""Measures unserializing urlencoded content carrying structured text values: a structure
+nested 100 and 400 levels deep, and a flat sequence of 5000 small records."""
+
+from harness import measure
+
+from scheme.formats import UrlEncoded
+
+def construct_nested(depth):
+    value = {'leaf': 'value'}
+    for i in range(depth):
+        value = {'id': str(i), 'tags': ['a', 'b'], 'child': value}
+    return UrlEncoded.serialize({'nested': value})
+
+def construct_records(count):
+    records = [{'id': str(i), 'name': 'record %d' % i, 'tags': ['a', 'b']} for i in range(count)]
+    return UrlEncoded.serialize({'records': records})
+
+if __name__ == '__main__':
+    for label, content, number in (('nested depth 100', construct_nested(100), 50),
+            ('nested depth 400', construct_nested(400), 10),
+            ('5000 flat records', construct_records(5000), 5)):
+        label = '%s (%dKB)' % (label, len(content) // 1024)
+        measure(label, lambda: UrlEncoded.unserialize(content), number)
@@ -0,0 +1,32 @@
+"""Measures serializing yaml documents whose block values are nested deeply, moderately
+and shallowly: a list of 10000 items nested 300 levels deep, 24 levels of small blocks,
+and a wide tree 8 levels deep."""
+
+from harness import measure
+
+from scheme.formats import Yaml
+
+def construct_deep_list(depth=300, size=10000):
+    value = [{'id': i, 'name': 'item %d' % i} for i in range(size)]
+    for i in range(depth):
+        value = ['level %d' % i, value]
+    return value
+
+def construct_small_blocks(depth=24, size=200):
+    value = {'leaf': True}
+    for i in range(depth):
+        value = {'level': i, 'siblings': [{'id': j, 'tags': ['a', 'b']} for j in range(size)],
+            'child': value}
+    return value
+
+def construct_wide_tree(depth=8, width=3):
+    if not depth:
+        return {'id': 1, 'name': 'leaf', 'description': 'a leaf of the tree'}
+    return dict(('branch%d' % i, construct_wide_tree(depth - 1, width)) for i in range(width))
+
+if __name__ == '__main__':
+    for label, document in (('long list nested 300 levels', construct_deep_list()),
+            ('24 levels of small blocks', construct_small_blocks()),
+            ('wide tree 8 levels deep', construct_wide_tree())):
+        label = '%s (%dKB)' % (label, len(Yaml.serialize(document)) // 1024)
+        measure(label, lambda: Yaml.serialize(document), 1, repeats=10)
@@ -1,8 +1,7 @@
-import re
 from traceback import format_exc
 from xml.sax.saxutils import escape
 
-from scheme.util import format_structure, indent
+from scheme.util import HTML_EXPR, Ancestry, contains_html, format_structure, indent
 
 __all__ = ('InvalidTypeError', 'SchemeError', 'StructuralError', 'ValidationError')
 
@@ -12,14 +11,15 @@ class SchemeError(Exception):
 class StructuralError(SchemeError):
     """A structural error."""
 
+    is_html = HTML_EXPR
+
     def __init__(self, *errors, **params):
         self.errors = list(errors)
         self.field = params.pop('field', None)
-        self.identity = params.pop('identity', '(unknown)')
+        self.identity = Ancestry.resolve(params.pop('identity', '(unknown)'))
         self.structure = params.pop('structure', None)
         self.tracebacks = None
         self.value = params.pop('value', None)
-        self.is_html = re.compile('<[^<]+?>')
 
         if params and 'token' in params:
             self.errors.append(params)
@@ -152,7 +152,7 @@ class StructuralError(SchemeError):
         elif isinstance(self.structure, dict):
             errors = {}
             for attr, value in self.structure.iteritems():
-                if self.is_html.search(attr):
+                if contains_html(attr):
                     attr = escape(attr)
                 if isinstance(value, StructuralError):
                     if value.structure is not None:
@@ -169,7 +169,7 @@ class ValidationError(StructuralError):
     def construct(self, error, **params):
         error = self.field.errors[error]
         msg = error.format(self.field, params)
-        if self.is_html.search(msg):
+        if contains_html(msg):
             msg = escape(msg)
         return self.append({'token': error.token, 'title': error.title,
             'message': msg})
@@ -178,5 +178,13 @@ class InvalidTypeError(ValidationError):
     """A validation error indicating the value being processed is invalid due
     to its type."""
 
+class CyclicParameterError(SchemeError):
+    """Raised when parameters being resolved reference one another cyclically. The
+    parameters forming the cycle are available as ``cycle``."""
+
+    def __init__(self, cycle):
+        super(CyclicParameterError, self).__init__(' -> '.join(map(str, cycle)))
+        self.cycle = cycle
+
 class UndefinedParameterError(SchemeError):
     """Raised when interpolation encounters an undefined parameter."""
@@ -2,14 +2,17 @@ import os
 import re
 from xml.sax.saxutils import escape
 from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import Mapping, Sequence as BaseSequence
 from copy import deepcopy
 from datetime import datetime, date, time
 from decimal import Decimal as decimal
+from threading import local
 from time import mktime, strptime
+from weakref import WeakSet
 
 from scheme.exceptions import *
 from scheme.formats import Format
-from scheme.interpolation import interpolate_parameters, UndefinedValueError
+from scheme.interpolation import interpolate_parameters, resolve_parameters, UndefinedValueError
 from scheme.surrogate import surrogate
 from scheme.timezone import LOCAL, UTC
 from scheme.util import *
@@ -22,8 +25,7 @@ except ImportError:
 NATIVELY_SERIALIZABLE = (basestring, bool, float, int, long, type(None), dict, list, tuple)
 PATTERN_TYPE = type(re.compile(''))
 
-INCOMING = 'incoming'
-OUTGOING = 'outgoing'
+compilation = local()
 
 class CannotDescribeError(Exception):
     """Raised when a parameter to a field cannot be described for serialization."""
@@ -75,14 +77,39 @@ class FieldMeta(type):
         field.types[field.type] = field
         return field
 
-    def reconstruct(field, specification):
-        """Reconstructs the field described by ``specification``."""
+    def reconstruct(field, specification, cached=False):
+        """Reconstructs the field described by ``specification``, which is not modified.
+
+        If ``cached`` is ``True``, the reconstructed field is retained in a bounded cache
+        keyed on the fingerprint of ``specification``, and reconstructing an equivalent
+        specification returns a clone of that field, as produced by :meth:`clone`; the
+        subfields of such clones are shared, and must not be modified in place. Repeated
+        specifications are first looked up by their representation, which is considerably
+        cheaper to produce than a fingerprint."""
 
         if isinstance(specification, Field):
             return specification
         if not specification:
             return
 
+        if cached:
+            reconstructions = field.reconstructions
+            token = repr(specification)
+
+            reconstruction = reconstructions.get(token)
+            if reconstruction is None:
+                fingerprint = fingerprint_structure(specification)
+                reconstruction = reconstructions.get(fingerprint)
+                if reconstruction is None:
+                    reconstruction = field.reconstruct(specification)
+                    if not reconstruction:
+                        return reconstruction
+                    reconstructions.put(fingerprint, reconstruction)
+                reconstructions.put(token, reconstruction)
+
+            return reconstruction.clone()
+
+        specification = dict(specification)
         if '__type__' in specification:
             fieldtype = specification.pop('__type__')
         elif 'fieldtype' in specification:
@@ -93,6 +120,92 @@ class FieldMeta(type):
         constructor = field.types[fieldtype]
         return constructor.construct(**specification)
 
+class CacheWatcher(object):
+    """A mixin under which assigning a public attribute of a field invalidates its caches.
+    A field only takes it on once it has cached descriptions or filtered views, or has
+    dependents which have, and drops it once those caches are invalidated, so constructing
+    and cloning fields does not pay for the hook."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if name[0] != '_':
+            if '_frozen' in self.__dict__:
+                raise TypeError('%r is a read-only filtered view' % self)
+            object.__setattr__(self, name, value)
+            self.invalidate_caches()
+        else:
+            object.__setattr__(self, name, value)
+
+class StreamedSequence(BaseSequence):
+    """A processed sequence whose items are only processed, each in its entirety, as they
+    are accessed, used when streaming a serialization. It is a read-only sequence, but not
+    a ``list``, so that it is never mistaken for an already processed value."""
+
+    def __init__(self, plan, value, ancestry):
+        self.ancestry = ancestry
+        self.plan = plan
+        self.value = value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self.value)))]
+        if index < 0:
+            index += len(self.value)
+        return self.plan(self.value[index], (self.ancestry, index, '[%s]'))
+
+    def __iter__(self):
+        plan, ancestry = self.plan, self.ancestry
+        for i, item in enumerate(self.value):
+            yield plan(item, (ancestry, i, '[%s]'))
+
+    def __len__(self):
+        return len(self.value)
+
+class StreamedStructure(Mapping):
+    """A processed structure whose values are only processed as they are accessed, used
+    when streaming a serialization. It is a read-only mapping, but not a ``dict``, so that
+    it is never mistaken for an already processed value. Its keys are those of the value
+    with a field in the structure, in key order, omitting null values of fields with
+    ``ignore_null`` specified."""
+
+    def __init__(self, definition, key_order, value, ancestry):
+        self.ancestry = ancestry
+        self.definition = definition
+        self.value = value
+
+        self.names = []
+        for name in key_order:
+            if name in value:
+                if value[name] is None and definition[name].ignore_null:
+                    continue
+                self.names.append(name)
+        self.present = frozenset(self.names)
+
+    def __contains__(self, name):
+        try:
+            return name in self.present
+        except TypeError:
+            return False
+
+    def __getitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        return self.definition[name]._stream_value(self.value[name],
+            (self.ancestry, name, '.%s'))
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def iteritems(self):
+        definition, value, ancestry = self.definition, self.value, self.ancestry
+        for name in self.names:
+            yield name, definition[name]._stream_value(value[name],
+                (ancestry, name, '.%s'))
+
 class Field(object):
     """A resource field.
 
@@ -142,19 +255,23 @@ class Field(object):
 
     :param preprocessor: Optional, default is ``None``; specifies a preprocessor
         function for this field, which will be given a value to preprocess after
-        unserialization but before validation.
+        unserialization but before validation. Since an invalid value can be processed
+        more than once to collect its errors, a preprocessor must be free of side effects.
 
     :param dict aspects: Optional, default is ``None``; if specified, a dictionary
         with string keys containing extension aspects for this field.
     """
 
     __metaclass__ = FieldMeta
+    reconstructions = LRUCache(256)
     types = {}
+    _watchers = {}
 
     basetype = None
     equivalent = None
     preprocessor = None
     structural = False
+    _unwatched = None
 
     parameters = {'name': None, 'constant': None, 'description': None, 'default': None,
         'nonnull': False, 'ignore_null': False, 'required': False, 'title': None,
@@ -230,37 +347,56 @@ class Field(object):
         return '%s(%s)' % (type(self).__name__, ', '.join(aspects))
 
     def __deepcopy__(self, memo):
-        return self.clone()
+        return self._clone(deepcopy, {})
 
     def __getattr__(self, name):
-        try:
-            return super(Field, self).__getattr__(name)
-        except AttributeError:
-            try:
-                return self.aspects[name]
-            except KeyError:
-                return None
+        aspects = self.__dict__.get('aspects')
+        if aspects:
+            return aspects.get(name)
 
     @property
     def guaranteed_name(self):
         return self.name or '(%s)' % self.type
 
     def clone(self, **params):
-        """Clones this field by deep copying it. Any keyboard parameters are applied to the
-        cloned field after cloning, overriding attributes already present."""
-
-        if 'default' not in params:
-            params['default'] = self.default
+        """Clones this field. The dicts, lists and tuples within the attributes of this field
+        are copied, but the fields and other values within them are shared with the clone,
+        so a clone of a structural field is cheap to produce regardless of the size of its
+        field tree; use ``deepcopy()`` to obtain an entirely independent copy. Any keyword
+        parameters are applied to the cloned field after cloning, overriding attributes
+        already present."""
+
+        return self._clone(copy_structure, params)
+
+    def compile(self, phase=INCOMING, serialized=False, max_errors=None):
+        """Compiles this field into a processing plan for the specified ``phase`` and
+        ``serialized`` mode, returning a callable with the signature ``(value, ancestry=None)``
+        which produces the same results as :meth:`process`. All parameter checks are decided
+        at compilation, so the plan reflects the field tree as it exists when compiled; it
+        must be recompiled if the field tree is subsequently modified. Structural fields
+        first process their values without tracking ancestry, and only reprocess a value to
+        collect its errors when it turns out to be invalid; preprocessors and callable
+        defaults within an invalid value can therefore be invoked more than once for the
+        same value, and must be free of side effects.
+
+        :param integer max_errors: Optional, defaults to ``None``; if specified, each
+            invocation of the plan stops descending into its value once this many errors
+            have been collected, as with :meth:`process`.
+        """
 
-        for key, value in self.__dict__.iteritems():
-            if key not in params:
-                try:
-                    value = deepcopy(value)
-                except TypeError:
-                    pass
-                params[key] = value
+        plan = self._compile(phase, serialized)
+        name = self.guaranteed_name
 
-        return type(self)(**params)
+        if max_errors is not None:
+            limit_errors = self._limit_errors
+            def process(value, ancestry=None):
+                return plan(value, limit_errors(ancestry, max_errors))
+        else:
+            def process(value, ancestry=None):
+                if ancestry is None:
+                    ancestry = (None, name, '%s')
+                return plan(value, ancestry)
+        return process
 
     @classmethod
     def construct(cls, **specification):
@@ -289,37 +425,32 @@ class Field(object):
         :param **params: Additional keyword parameters, if specified, will be serialized and
             included in the description.
 
+        Descriptions are cached for each combination of ``parameters``, ``verbose`` and
+        ``params`` until an attribute of this field or of a field within its field tree is
+        assigned, or such a field is otherwise modified (see :meth:`invalidate_caches`);
+        each call returns its own copy of the cached description.
+
         :rtype: dict
         """
 
-        description = {'__type__': self.type}
-        for attr, value in self.aspects.iteritems():
-            if value is not None:
-                try:
-                    description[attr] = self._describe_parameter(value)
-                except CannotDescribeError:
-                    pass
-
-        for source in (self.parameters, parameters):
-            if not source:
-                continue
-            for parameter, default_value in source.iteritems():
-                if parameter not in params:
-                    value = getattr(self, parameter, None)
-                    if value is not None and (verbose or value is not default_value):
-                        try:
-                            description[parameter] = self._describe_parameter(value)
-                        except CannotDescribeError:
-                            pass
-
-        for name, value in params.iteritems():
-            if value is not None:
-                try:
-                    description[name] = self._describe_parameter(value)
-                except CannotDescribeError:
-                    pass
-
-        return description
+        key = verbose
+        if parameters or params:
+            try:
+                key = (frozenset((parameters or {}).iteritems()), verbose,
+                    frozenset(params.iteritems()))
+            except TypeError:
+                return self._describe(parameters, verbose, **params)
+
+        descriptions = self.__dict__.get('_descriptions')
+        if descriptions is None:
+            descriptions = self._descriptions = {}
+            self._depend_on_subfields()
+            self._watch()
+
+        description = descriptions.get(key)
+        if description is None:
+            description = descriptions[key] = self._describe(parameters, verbose, **params)
+        return copy_structure(description)
 
     def extract(self, subject, strict=True, sparse=True, **params):
         """Attempts to extract a valid value for this field from ``subject``, using the
@@ -386,7 +517,40 @@ class Field(object):
         else:
             return interpolate_parameters(subject, parameters, interpolator, True)
 
-    def process(self, value, phase=INCOMING, serialized=False, ancestry=None):
+    def invalidate_caches(self):
+        """Invalidates the descriptions and filtered views cached by this field and by every
+        field whose field tree contains this field. Assigning an attribute of a field, or modifying it through
+        methods such as :meth:`Structure.insert`, does so automatically; this must otherwise
+        be called on a field which may already have been described or filtered whenever a
+        value within one of its attributes is modified in place."""
+
+        self.__dict__.pop('_descriptions', None)
+        self.__dict__.pop('_filters', None)
+        self.__dict__.pop('_subscribed', None)
+
+        dependents = self.__dict__.pop('_dependents', None)
+        if self._unwatched and '_frozen' not in self.__dict__:
+            self.__class__ = self._unwatched
+
+        if dependents:
+            for dependent in list(dependents):
+                dependent.invalidate_caches()
+
+    def prepare_interpolation(self, subject, interpolator=None):
+        """Prepares ``subject`` for repeated interpolation, returning a callable with the
+        signature ``(parameters)`` which produces the same results as :meth:`interpolate`.
+        ``subject`` is analysed once, so that each invocation only interpolates the values
+        within it which contain templates; all other values are interpolated during
+        preparation and shared between invocations, so they must not be modified, and
+        ``subject`` itself must not be modified while the callable is in use."""
+
+        value, plan = self._prepare_interpolation(subject, interpolator)
+        if plan is None:
+            def plan(parameters):
+                return value
+        return plan
+
+    def process(self, value, phase=INCOMING, serialized=False, ancestry=None, max_errors=None):
         """Processes ``value`` for this field, serializing or unserializing as appropriate,
         then validating.
 
@@ -399,10 +563,15 @@ class Field(object):
         :param boolean serialized: Optional, defaults to ``False``; if ``True``, indicates
             ``value`` should either be unserialized before validation, if ``phase`` is
             ``incoming``, or serialized after validation, if ``phase`` is ``outgoing``.
+
+        :param integer max_errors: Optional, defaults to ``None``; if specified, structural
+            fields stop descending into ``value`` once this many errors have been collected,
+            and the structure of the raised :exc:`ValidationError` only covers the portion
+            of ``value`` processed up to that point. ``max_errors=1`` fails fast.
         """
 
-        if not ancestry:
-            ancestry = [self.guaranteed_name]
+        if ancestry is None:
+            ancestry = (None, self.guaranteed_name, '%s')
 
         if self._is_null(value, ancestry):
             return None
@@ -425,9 +594,67 @@ class Field(object):
 
         return value
 
+    def process_many(self, values, phase=INCOMING, serialized=False, max_errors=None):
+        """Processes each value in ``values`` for this field, compiling this field once
+        for the entire batch. Returns a list of processed values if all values are valid;
+        otherwise, a :exc:`ValidationError` is raised with a structure containing the
+        processed values and errors for each index, as with :class:`Sequence`.
+
+        :param values: An iterable of values to process.
+
+        :param string phase: The phase for this particular processing, as with :meth:`process`.
+
+        :param boolean serialized: Optional, defaults to ``False``; as with :meth:`process`.
+
+        :param integer max_errors: Optional, defaults to ``None``; if specified, processing
+            stops once this many values have failed, and the structure of the raised error
+            only extends to the last failed value.
+        """
+
+        valid = True
+        sequence = []
+
+        for value, error in self.process_stream(values, phase, serialized, max_errors):
+            if error is None:
+                sequence.append(value)
+            else:
+                valid = False
+                sequence.append(error)
+
+        if valid:
+            return sequence
+        else:
+            raise ValidationError(identity=(None, self.guaranteed_name, '%s'), field=self,
+                value=values, structure=sequence)
+
+    def process_stream(self, values, phase=INCOMING, serialized=False, max_errors=None):
+        """Processes each value in ``values`` for this field as it is consumed, compiling
+        this field once for the entire stream. Yields a ``(value, error)`` pair for each
+        value, where ``error`` is ``None`` if the value was successfully processed, and
+        the :exc:`StructuralError` raised for it otherwise.
+
+        :param integer max_errors: Optional, defaults to ``None``; if specified, the stream
+            stops after yielding this many errors.
+        """
+
+        plan = self._compile(phase, serialized)
+        root = (None, self.guaranteed_name, '%s')
+        errors = 0
+
+        for i, value in enumerate(values):
+            try:
+                value = plan(value, (root, i, '[%s]'))
+            except StructuralError, exception:
+                yield None, exception
+                errors += 1
+                if max_errors is not None and errors >= max_errors:
+                    return
+            else:
+                yield value, None
+
     def read(self, path, **params):
-        """Reads the content of the file at ``path``, unserializes it, then processes it
-        as an incoming value for this field."""
+        """Reads the content of ``path``, which is either the path to a file or a file-like
+        object, unserializes it, then processes it as an incoming value for this field."""
 
         data = Format.read(path, **params)
         return self.process(data, INCOMING, True)
@@ -451,6 +678,17 @@ class Field(object):
             value = Format.formats[format].serialize(value, **params)
         return value
 
+    def serialize_stream(self, value, format, fileobj, **params):
+        """Serializes ``value`` to the file-like ``fileobj`` using ``format``, which must
+        support streaming, after processing it as an outgoing value for this field. Starting
+        from this field, the values of structures are processed as they are encoded, as are
+        the items of sequences, so that only one item of any sequence is held in memory, in
+        processed form, at a time. The first error encountered is raised, in which case part
+        of the serialization may already have been written to ``fileobj``."""
+
+        value = self._stream_value(value, (None, self.guaranteed_name, '%s'))
+        Format.formats[format].serialize_stream(value, fileobj, **params)
+
     def transform(self, transformer):
         candidate = transformer(self)
         if isinstance(candidate, Field):
@@ -470,9 +708,155 @@ class Field(object):
     def visit(cls, specification, callback):
         return cls.types[specification['__type__']]._visit_field(specification, callback)
 
-    def write(self, path, value, format=None, **params):
-        value = self.process(value, OUTGOING, True)
-        Format.write(path, value, format, **params)
+    def write(self, path, value, format=None, streaming=False, **params):
+        """Processes ``value`` as an outgoing value for this field, then serializes it to
+        ``path``, which is either the path to a file or a file-like object, using ``format``
+        or the format indicated by the extension of ``path``.
+
+        :param boolean streaming: Optional, default is ``False``; if ``True`` and the format
+            supports streaming, ``value`` is processed as it is serialized, as with
+            :meth:`serialize_stream`, rather than entirely before serialization.
+
+        A ``schema`` parameter, for formats such as csv which accept one, only determines the
+        layout of the serialization, since ``value`` has already been processed.
+        """
+
+        format = Format.identify(path, format)
+        if params.get('schema'):
+            params['serialized'] = True
+        if streaming and format.streaming:
+            value = self._stream_value(value, (None, self.guaranteed_name, '%s'))
+        else:
+            value = self.process(value, OUTGOING, True)
+        format.write(path, value, **params)
+
+    def _clone(self, copy, params):
+        if 'default' not in params:
+            params['default'] = self.default
+
+        for key, value in self.__dict__.iteritems():
+            if key[0] != '_' and key not in params:
+                try:
+                    value = copy(value)
+                except TypeError:
+                    pass
+                params[key] = value
+
+        return (self._unwatched or type(self))(**params)
+
+    def _compile(self, phase, serialized):
+        plans = getattr(compilation, 'plans', None)
+        if plans is None:
+            compilation.plans = {}
+            try:
+                return self._compile(phase, serialized)
+            finally:
+                compilation.plans = None
+
+        key = (id(self), phase, serialized)
+        if key in plans:
+            return plans[key]
+
+        compiled = []
+        def plan(value, ancestry):
+            return compiled[0](value, ancestry)
+
+        plans[key] = plan
+        compiled.append(self._compile_plan(phase, serialized))
+        plans[key] = compiled[0]
+        return compiled[0]
+
+    def _compile_fallback(self, phase, serialized):
+        process = self.process
+        def plan(value, ancestry):
+            return process(value, phase, serialized, ancestry)
+        return plan
+
+    def _compile_plan(self, phase, serialized):
+        if self._overrides(Field, 'process'):
+            return self._compile_fallback(phase, serialized)
+
+        field = self
+        constant = self.constant
+        custom_null = self._overrides(Field, '_is_null')
+        is_null = self._is_null
+        preprocessor = self.preprocessor
+
+        unserialize = validate = serialize = None
+        if serialized and phase == INCOMING and self._overrides(Field, '_unserialize_value'):
+            unserialize = self._unserialize_value
+        if self._overrides(Field, '_validate_value'):
+            validate = self._validate_value
+        if serialized and phase == OUTGOING and self._overrides(Field, '_serialize_value'):
+            serialize = self._serialize_value
+
+        if validate and not (preprocessor or serialize or constant is not None):
+            return self._compile_validation(unserialize, validate)
+
+        def plan(value, ancestry):
+            if value is None or custom_null:
+                if is_null(value, ancestry):
+                    return None
+            if unserialize:
+                value = unserialize(value, ancestry)
+            if preprocessor:
+                value = preprocessor(value)
+            if constant is not None and value != constant:
+                raise InvalidTypeError(identity=ancestry, field=field, value=value).construct('invalid')
+
+            if validate:
+                candidate = validate(value, ancestry)
+                if candidate is not None:
+                    value = candidate
+
+            if serialize:
+                try:
+                    value = serialize(value)
+                except OverflowError:
+                    raise ValidationError(identity=ancestry, field=field, value=value).construct('overflow')
+            return value
+        return plan
+
+    def _compile_subfield(self, field, phase, serialized):
+        if not isinstance(field, Field):
+            raise SchemeError('cannot compile %r with an undefined subfield' % self)
+        return field._compile(phase, serialized)
+
+    def _compile_passthrough(self, cls, plan, types):
+        if (self._overrides(Field, '_is_null') or self._overrides(cls, '_unserialize_value')
+                or self._overrides(cls, '_validate_value')):
+            return plan
+
+        def passthrough(value, ancestry):
+            if type(value) in types:
+                return value
+            return plan(value, ancestry)
+        return passthrough
+
+    def _compile_validation(self, unserialize, validate):
+        custom_null = self._overrides(Field, '_is_null')
+        is_null = self._is_null
+
+        if unserialize:
+            def plan(value, ancestry):
+                if value is None or custom_null:
+                    if is_null(value, ancestry):
+                        return None
+                value = unserialize(value, ancestry)
+                candidate = validate(value, ancestry)
+                if candidate is not None:
+                    return candidate
+                return value
+        else:
+            def plan(value, ancestry):
+                if value is None or custom_null:
+                    if is_null(value, ancestry):
+                        return None
+                candidate = validate(value, ancestry)
+                if candidate is not None:
+                    return candidate
+                return value
+        return plan
 
     @classmethod
     def _construct_parameter(cls, parameter):
@@ -491,6 +875,49 @@ class Field(object):
         else:
             return parameter
 
+    def _depend_on_subfields(self):
+        if self.__dict__.get('_subscribed'):
+            return
+
+        self._subscribed = True
+        for subfield in self._get_subfields():
+            dependents = subfield.__dict__.get('_dependents')
+            if dependents is None:
+                dependents = subfield._dependents = WeakSet()
+                subfield._watch()
+            dependents.add(self)
+            subfield._depend_on_subfields()
+
+    def _describe(self, parameters, verbose, **params):
+        description = {'__type__': self.type}
+        for attr, value in self.aspects.iteritems():
+            if value is not None:
+                try:
+                    description[attr] = self._describe_parameter(value)
+                except CannotDescribeError:
+                    pass
+
+        for source in (self.parameters, parameters):
+            if not source:
+                continue
+            for parameter, default_value in source.iteritems():
+                if parameter not in params:
+                    value = getattr(self, parameter, None)
+                    if value is not None and (verbose or value is not default_value):
+                        try:
+                            description[parameter] = self._describe_parameter(value)
+                        except CannotDescribeError:
+                            pass
+
+        for name, value in params.iteritems():
+            if value is not None:
+                try:
+                    description[name] = self._describe_parameter(value)
+                except CannotDescribeError:
+                    pass
+
+        return description
+
     def _describe_parameter(self, parameter):
         if isinstance(parameter, dict):
             return dict((k, self._describe_parameter(v)) for k, v in parameter.iteritems())
@@ -507,6 +934,44 @@ class Field(object):
         else:
             raise CannotDescribeError(parameter)
 
+    def _freeze(self):
+        self.aspects = ReadOnlyDict(self.aspects)
+        self._frozen = True
+        self._watch()
+
+    def _get_filtered_view(self, exclusive, params, filter):
+        try:
+            key = (exclusive, frozenset(params.iteritems()))
+        except TypeError:
+            return filter(exclusive, params)
+
+        views = self.__dict__.get('_filters')
+        if views is None:
+            views = self._filters = {}
+            self._depend_on_subfields()
+            self._watch()
+
+        try:
+            return views[key]
+        except KeyError:
+            view = views[key] = filter(exclusive, params)
+            if view is not None and view is not self:
+                view._freeze()
+            return view
+
+    def _get_subfields(self):
+        subfields = []
+        candidates = [value for key, value in self.__dict__.iteritems() if key[0] != '_']
+        while candidates:
+            candidate = candidates.pop()
+            if isinstance(candidate, Field):
+                subfields.append(candidate)
+            elif isinstance(candidate, dict):
+                candidates.extend(candidate.itervalues())
+            elif isinstance(candidate, (list, tuple)):
+                candidates.extend(candidate)
+        return subfields
+
     def _is_null(self, value, ancestry):
         if value is None:
             if self.nonnull:
@@ -514,11 +979,51 @@ class Field(object):
             else:
                 return True
 
+    def _limit_errors(self, ancestry, max_errors):
+        if ancestry is None:
+            ancestry = [self.guaranteed_name]
+        return Ancestry('', ancestry, limit=ErrorLimit(max_errors))
+
+    def _overrides(self, cls, attr):
+        return getattr(type(self), attr).im_func is not getattr(cls, attr).im_func
+
+    def _watch(self):
+        if self._unwatched:
+            return
+
+        cls = type(self)
+        watcher = self._watchers.get(cls)
+        if watcher is None:
+            watcher = self._watchers[cls] = type.__new__(FieldMeta, cls.__name__,
+                (cls, CacheWatcher), {'__module__': cls.__module__, '__slots__': (),
+                '_unwatched': cls})
+        self.__class__ = watcher
+
+    def _prepare_fallback(self, subject, interpolator):
+        interpolate = self.interpolate
+        def plan(parameters):
+            return interpolate(subject, parameters, interpolator)
+        return None, plan
+
+    def _prepare_interpolation(self, subject, interpolator):
+        if isinstance(subject, (dict, list, tuple)):
+            return self._prepare_fallback(subject, interpolator)
+        if isinstance(subject, basestring) and '{' in subject:
+            return self._prepare_fallback(subject, interpolator)
+
+        try:
+            return self.interpolate(subject, {}, interpolator), None
+        except Exception:
+            return self._prepare_fallback(subject, interpolator)
+
     def _serialize_value(self, value):
         """Serializes and returns ``value``, if necessary."""
 
         return value
 
+    def _stream_value(self, value, ancestry):
+        return self.process(value, OUTGOING, True, ancestry)
+
     def _unserialize_value(self, value, ancestry):
         return value
 
@@ -606,6 +1111,10 @@ class Boolean(Field):
         FieldError('invalid', 'invalid value', '%(field)s must be a boolean value'),
     ]
 
+    def _compile_validation(self, unserialize, validate):
+        plan = super(Boolean, self)._compile_validation(unserialize, validate)
+        return self._compile_passthrough(Boolean, plan, (bool,))
+
     def _validate_value(self, value, ancestry):
         if not isinstance(value, bool):
             raise InvalidTypeError(identity=ancestry, field=self, value=value).construct('invalid')
@@ -621,6 +1130,7 @@ class Date(Field):
 
     basetype = 'date'
     equivalent = date
+    expr = re.compile(r'^(\d{4})-(\d{2})-(\d{2})\Z')
     parameters = {'maximum': None, 'minimum': None}
     pattern = '%Y-%m-%d'
 
@@ -651,6 +1161,10 @@ class Date(Field):
             return value
 
         try:
+            if self.pattern == Date.pattern:
+                match = self.expr.match(value)
+                if match:
+                    return date(*map(int, match.groups()))
             return date(*strptime(value, self.pattern)[:3])
         except Exception:
             raise InvalidTypeError(identity=ancestry, field=self, value=value).construct('invalid')
@@ -699,6 +1213,7 @@ class DateTime(Field):
 
     basetype = 'datetime'
     equivalent = datetime
+    expr = re.compile(r'^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})Z\Z')
     parameters = {'maximum': None, 'minimum': None, 'utc': False}
     pattern = '%Y-%m-%dT%H:%M:%SZ'
 
@@ -748,6 +1263,10 @@ class DateTime(Field):
             return value
 
         try:
+            if self.pattern == DateTime.pattern:
+                match = self.expr.match(value)
+                if match:
+                    return datetime(*map(int, match.groups()), tzinfo=UTC)
             unserialized = datetime(*strptime(value, self.pattern)[:6])
             return unserialized.replace(tzinfo=UTC)
         except Exception:
@@ -955,6 +1474,7 @@ class Enumeration(Field):
 
         self.enumeration = list(set(baseline + enumeration))
         self.representation = ', '.join([repr(value) for value in self.enumeration])
+        self.invalidate_caches()
 
     def _is_null(self, value, ancestry):
         ignored_values = self.ignored_values
@@ -1039,6 +1559,12 @@ class Float(Field):
         else:
             return float(interpolate_parameters(subject, parameters, interpolator, True))
 
+    def _compile_validation(self, unserialize, validate):
+        plan = super(Float, self)._compile_validation(unserialize, validate)
+        if self.minimum is not None or self.maximum is not None:
+            return plan
+        return self._compile_passthrough(Float, plan, (float,))
+
     def _unserialize_value(self, value, ancestry):
         if isinstance(value, float):
             return value
@@ -1109,6 +1635,12 @@ class Integer(Field):
         else:
             return int(interpolate_parameters(subject, parameters, interpolator, True))
 
+    def _compile_validation(self, unserialize, validate):
+        plan = super(Integer, self)._compile_validation(unserialize, validate)
+        if self.minimum is not None or self.maximum is not None:
+            return plan
+        return self._compile_passthrough(Integer, plan, (int, long))
+
     def _unserialize_value(self, value, ancestry):
         if value is True or value is False:
             raise InvalidTypeError(identity=ancestry, field=self, value=value).construct('invalid')
@@ -1191,21 +1723,6 @@ class Map(Field):
             aspects.append('required_keys=%r' % sorted(self.required_keys))
         return super(Map, self).__repr__(aspects)
 
-    def describe(self, parameters=None, verbose=False):
-        if not isinstance(self.value, Field):
-            raise SchemeError()
-
-        default = None
-        if self.default:
-            default = {}
-            for key, value in self.default.iteritems():
-                default[key] = self.value.process(value, OUTGOING, True)
-
-        params = {'value': self.value.describe(parameters, verbose), 'default': default}
-        if self.key:
-            params['key'] = self.key.describe(parameters, verbose)
-        return super(Map, self).describe(parameters, verbose, **params)
-
     def extract(self, subject, strict=True, sparse=True, **params):
         if params and not self.screen(**params):
             raise FieldExcludedError(self)
@@ -1252,9 +1769,11 @@ class Map(Field):
                 continue
         return interpolation
         
-    def process(self, value, phase=INCOMING, serialized=False, ancestry=None):
-        if not ancestry:
-            ancestry = [self.guaranteed_name]
+    def process(self, value, phase=INCOMING, serialized=False, ancestry=None, max_errors=None):
+        if max_errors is not None:
+            ancestry = self._limit_errors(ancestry, max_errors)
+        elif ancestry is None:
+            ancestry = (None, self.guaranteed_name, '%s')
 
         if self._is_null(value, ancestry):
             return None
@@ -1271,24 +1790,28 @@ class Map(Field):
         for name, subvalue in value.iteritems():
             if key_field:
                 try:
-                    name = key_field.process(name, phase, serialized, ancestry + ['[%s]' % name])
+                    name = key_field.process(name, phase, serialized, (ancestry, name, '[%s]'))
                 except StructuralError, exception:
                     raise ValidationError(identity=ancestry, field=self, value=value).construct('invalidkeys')
             elif not isinstance(name, basestring):
                 raise ValidationError(identity=ancestry, field=self, value=value).construct('invalidkeys')
 
             try:
-                map[name] = value_field.process(subvalue, phase, serialized, ancestry + ['[%s]' % name])
+                map[name] = value_field.process(subvalue, phase, serialized, (ancestry, name, '[%s]'))
             except StructuralError, exception:
                 valid = False
                 map[name] = exception
-
-        if self.required_keys:
-            for name in self.required_keys:
-                if name not in map:
-                    valid = False
-                    map[name] = ValidationError(identity=ancestry, field=self).construct(
-                        'required', name=name)
+                if tally_errors(ancestry, len(exception.errors)):
+                    break
+        else:
+            if self.required_keys:
+                for name in self.required_keys:
+                    if name not in map:
+                        valid = False
+                        map[name] = ValidationError(identity=ancestry, field=self).construct(
+                            'required', name=name)
+                        if tally_errors(ancestry):
+                            break
 
         if not valid:
             raise ValidationError(identity=ancestry, field=self, value=value, structure=map)
@@ -1308,8 +1831,133 @@ class Map(Field):
         else:
             return self.clone(value=candidate)
 
+    def _compile_plan(self, phase, serialized):
+        if self._overrides(Map, 'process'):
+            return self._compile_fallback(phase, serialized)
+
+        field = self
+        custom_null = self._overrides(Field, '_is_null')
+        is_null = self._is_null
+        preprocessor = self.preprocessor
+        required_keys = self.required_keys
+
+        key_plan = None
+        if self.key:
+            key_plan = self._compile_subfield(self.key, phase, serialized)
+        value_plan = self._compile_subfield(self.value, phase, serialized)
+
+        def construct(value):
+            map = {}
+            for name, subvalue in value.iteritems():
+                if key_plan:
+                    name = key_plan(name, None)
+                elif not isinstance(name, basestring):
+                    raise StructuralError()
+                map[name] = value_plan(subvalue, None)
+
+            if required_keys:
+                for name in required_keys:
+                    if name not in map:
+                        raise StructuralError()
+            return map
+
+        def collect(value, ancestry):
+            valid = True
+            map = {}
+
+            for name, subvalue in value.iteritems():
+                if key_plan:
+                    try:
+                        name = key_plan(name, (ancestry, name, '[%s]'))
+                    except StructuralError:
+                        raise ValidationError(identity=ancestry, field=field, value=value).construct('invalidkeys')
+                elif not isinstance(name, basestring):
+                    raise ValidationError(identity=ancestry, field=field, value=value).construct('invalidkeys')
+
+                try:
+                    map[name] = value_plan(subvalue, (ancestry, name, '[%s]'))
+                except StructuralError, exception:
+                    valid = False
+                    map[name] = exception
+                    if tally_errors(ancestry, len(exception.errors)):
+                        break
+            else:
+                if required_keys:
+                    for name in required_keys:
+                        if name not in map:
+                            valid = False
+                            map[name] = ValidationError(identity=ancestry, field=field).construct(
+                                'required', name=name)
+                            if tally_errors(ancestry):
+                                break
+
+            if not valid:
+                raise ValidationError(identity=ancestry, field=field, value=value, structure=map)
+            return map
+
+        def plan(value, ancestry):
+            if value is None or custom_null:
+                if is_null(value, ancestry):
+                    return None
+            if not isinstance(value, dict):
+                raise InvalidTypeError(identity=ancestry, field=field, value=value).construct('invalid')
+            if preprocessor:
+                value = preprocessor(value)
+
+            try:
+                return construct(value)
+            except StructuralError:
+                if ancestry is None:
+                    raise StructuralError()
+            return collect(value, ancestry)
+        return plan
+
     def _define_undefined_field(self, field):
         self.value = field
+        self.invalidate_caches()
+
+    def _describe(self, parameters, verbose, **params):
+        if not isinstance(self.value, Field):
+            raise SchemeError()
+
+        default = None
+        if self.default:
+            default = {}
+            for key, value in self.default.iteritems():
+                default[key] = self.value.process(value, OUTGOING, True)
+
+        params.update(value=self.value.describe(parameters, verbose), default=default)
+        if self.key:
+            params['key'] = self.key.describe(parameters, verbose)
+        return super(Map, self)._describe(parameters, verbose, **params)
+
+    def _prepare_interpolation(self, subject, interpolator):
+        if not isinstance(subject, dict) or self._overrides(Map, 'interpolate'):
+            return super(Map, self)._prepare_interpolation(subject, interpolator)
+
+        definition = self.value
+        interpolation = {}
+        plans = []
+
+        for key, value in subject.iteritems():
+            value, plan = definition._prepare_interpolation(value, interpolator)
+            if plan:
+                plans.append((key, plan))
+            else:
+                interpolation[key] = value
+
+        if not plans:
+            return interpolation, None
+
+        def plan(parameters):
+            values = interpolation.copy()
+            for key, interpolate in plans:
+                try:
+                    values[key] = interpolate(parameters)
+                except UndefinedValueError:
+                    continue
+            return values
+        return None, plan
 
     @classmethod
     def _visit_field(cls, specification, callback):
@@ -1413,17 +2061,6 @@ class Sequence(Field):
             aspects.append('unique=True')
         return super(Sequence, self).__repr__(aspects)
 
-    def describe(self, parameters=None, verbose=False):
-        if not isinstance(self.item, Field):
-            raise SchemeError()
-
-        default = None
-        if self.default:
-            default = [self.item.process(value, OUTGOING, True) for value in self.default]
-
-        return super(Sequence, self).describe(parameters, verbose, 
-            item=self.item.describe(parameters, verbose), default=default)
-
     def extract(self, subject, strict=True, sparse=True, **params):
         if params and not self.screen(**params):
             raise FieldExcludedError(self)
@@ -1445,12 +2082,10 @@ class Sequence(Field):
         return extraction
 
     def filter(self, exclusive=False, **params):
-        if not super(Sequence, self).filter(exclusive, **params):
-            return None
-        if self.item and self.item.structural:
-            return self.clone(item=self.item.filter(exclusive, **params))
-        else:
-            return self
+        """Filters this field and its item based on the tests given in ``params``. Filtered
+        views are cached as with :meth:`Structure.filter`, and cannot be modified."""
+
+        return self._get_filtered_view(exclusive, params, self._filter)
 
     def instantiate(self, value, key=None):
         if value is None:
@@ -1475,9 +2110,11 @@ class Sequence(Field):
             interpolation.append(definition.interpolate(item, parameters, interpolator))
         return interpolation
 
-    def process(self, value, phase=INCOMING, serialized=False, ancestry=None):
-        if not ancestry:
-            ancestry = [self.guaranteed_name]
+    def process(self, value, phase=INCOMING, serialized=False, ancestry=None, max_errors=None):
+        if max_errors is not None:
+            ancestry = self._limit_errors(ancestry, max_errors)
+        elif ancestry is None:
+            ancestry = (None, self.guaranteed_name, '%s')
 
         if self._is_null(value, ancestry):
             return None
@@ -1502,10 +2139,12 @@ class Sequence(Field):
         sequence = []
         for i, subvalue in enumerate(value):
             try:
-                sequence.append(item.process(subvalue, phase, serialized, ancestry + ['[%s]' % i]))
+                sequence.append(item.process(subvalue, phase, serialized, (ancestry, i, '[%s]')))
             except StructuralError, exception:
                 valid = False
                 sequence.append(exception)
+                if tally_errors(ancestry, len(exception.errors)):
+                    break
 
         if not valid:
             raise ValidationError(identity=ancestry, field=self, value=value, structure=sequence)
@@ -1527,30 +2166,175 @@ class Sequence(Field):
         else:
             return self.clone(item=candidate)
 
-    def _define_undefined_field(self, field):
-        self.item = field
+    def unserialize_stream(self, fileobj, format='json', **params):
+        """Unserializes a sequence from the file-like ``fileobj`` using ``format``, which
+        must support streaming, yielding each item of the sequence as soon as it has been
+        read and processed, so that only one item is held in memory at a time. The
+        :exc:`StructuralError` raised for the first invalid item is propagated. The
+        ``min_length`` and ``max_length`` of this field are checked as the stream is
+        consumed, but ``unique`` and ``preprocessor`` are not applied.
 
-    @classmethod
-    def _visit_field(cls, specification, callback):
-        return {'item': callback(specification['item'])}
+        :param string format: Optional, defaults to ``'json'``; the format of ``fileobj``.
+        """
 
-class Structure(Field):
-    """A field for structures of key/value pairs.
+        plan = self.item._compile(INCOMING, True)
+        ancestry = (None, self.guaranteed_name, '%s')
+        max_length = self.max_length
 
-    A structure is defined with an explicit set of keys, each with a :class:`Field` value
-    specifying the potential value for that key. 
+        count = 0
+        for value in Format.formats[format].unserialize_stream(fileobj, **params):
+            if max_length is not None and count >= max_length:
+                raise ValidationError(identity=ancestry, field=self).construct('max_length',
+                    max_length=max_length, noun=pluralize('item', max_length))
+            yield plan(value, (ancestry, count, '[%s]'))
+            count += 1
 
-    Structures can be polymorphic, such that a discriminator value within a candidate value
-    is used to determine the structure variant to be used to parse the rest of the candidate
-    value. To define a polymorphic structure, ``polymorphic_on`` needs to be specified and
-    ``structure`` needs to be nested accordingly.
+        min_length = self.min_length
+        if min_length is not None and count < min_length:
+            raise ValidationError(identity=ancestry, field=self).construct('min_length',
+                min_length=min_length, noun=pluralize('item', min_length))
 
-    :param dict structure: A ``dict`` containing ``string`` keys and :class:`Field` values
-        which describes the structure of this field. When polymorphic, ``structure`` should
-        be a 
+    def _compile_plan(self, phase, serialized):
+        if self._overrides(Sequence, 'process'):
+            return self._compile_fallback(phase, serialized)
 
-    :param boolean strict: Optional, default is ``True``; if ``False``, key/value pairs
-        which are not defined in ``structure`` will be silently ignored during validation
+        field = self
+        custom_null = self._overrides(Field, '_is_null')
+        is_null = self._is_null
+        item_plan = self._compile_subfield(self.item, phase, serialized)
+        max_length = self.max_length
+        min_length = self.min_length
+        preprocessor = self.preprocessor
+        unique = self.unique
+
+        def collect(value, ancestry):
+            valid = True
+            sequence = []
+
+            for i, subvalue in enumerate(value):
+                try:
+                    sequence.append(item_plan(subvalue, (ancestry, i, '[%s]')))
+                except StructuralError, exception:
+                    valid = False
+                    sequence.append(exception)
+                    if tally_errors(ancestry, len(exception.errors)):
+                        break
+
+            if valid:
+                return sequence
+            else:
+                raise ValidationError(identity=ancestry, field=field, value=value, structure=sequence)
+
+        def plan(value, ancestry):
+            if value is None or custom_null:
+                if is_null(value, ancestry):
+                    return None
+            if not isinstance(value, list):
+                raise InvalidTypeError(identity=ancestry, field=field, value=value).construct('invalid')
+            if preprocessor:
+                value = preprocessor(value)
+
+            if min_length is not None and len(value) < min_length:
+                raise ValidationError(identity=ancestry, field=field, value=value).construct('min_length',
+                    min_length=min_length, noun=pluralize('item', min_length))
+            if max_length is not None and len(value) > max_length:
+                raise ValidationError(identity=ancestry, field=field, value=value).construct('max_length',
+                    max_length=max_length, noun=pluralize('item', max_length))
+
+            try:
+                sequence = [item_plan(subvalue, None) for subvalue in value]
+            except StructuralError:
+                if ancestry is None:
+                    raise StructuralError()
+                sequence = collect(value, ancestry)
+
+            if unique and len(set(sequence)) != len(sequence):
+                raise ValidationError(identity=ancestry, field=field, value=value).construct('duplicate')
+            return sequence
+        return plan
+
+    def _define_undefined_field(self, field):
+        self.item = field
+        self.invalidate_caches()
+
+    def _describe(self, parameters, verbose, **params):
+        if not isinstance(self.item, Field):
+            raise SchemeError()
+
+        default = None
+        if self.default:
+            default = [self.item.process(value, OUTGOING, True) for value in self.default]
+
+        params.update(item=self.item.describe(parameters, verbose), default=default)
+        return super(Sequence, self)._describe(parameters, verbose, **params)
+
+    def _filter(self, exclusive, params):
+        if not super(Sequence, self).filter(exclusive, **params):
+            return None
+        if self.item and self.item.structural:
+            return self.clone(item=self.item.filter(exclusive, **params))
+        else:
+            return self
+
+    def _prepare_interpolation(self, subject, interpolator):
+        if not isinstance(subject, (list, tuple)) or self._overrides(Sequence, 'interpolate'):
+            return super(Sequence, self)._prepare_interpolation(subject, interpolator)
+
+        definition = self.item
+        entries = [definition._prepare_interpolation(item, interpolator) for item in subject]
+        if not any(plan for value, plan in entries):
+            return [value for value, plan in entries], None
+
+        def plan(parameters):
+            interpolation = []
+            for value, interpolate in entries:
+                if interpolate:
+                    value = interpolate(parameters)
+                interpolation.append(value)
+            return interpolation
+        return None, plan
+
+    def _stream_value(self, value, ancestry):
+        if self.unique or self.preprocessor or self._overrides(Sequence, 'process'):
+            return self.process(value, OUTGOING, True, ancestry)
+        if self._is_null(value, ancestry):
+            return None
+        if not isinstance(value, list):
+            raise InvalidTypeError(identity=ancestry, field=self, value=value).construct('invalid')
+
+        min_length = self.min_length
+        if min_length is not None and len(value) < min_length:
+            raise ValidationError(identity=ancestry, field=self, value=value).construct('min_length',
+                min_length=min_length, noun=pluralize('item', min_length))
+
+        max_length = self.max_length
+        if max_length is not None and len(value) > max_length:
+            raise ValidationError(identity=ancestry, field=self, value=value).construct('max_length',
+                max_length=max_length, noun=pluralize('item', max_length))
+
+        return StreamedSequence(self._compile_subfield(self.item, OUTGOING, True), value, ancestry)
+
+    @classmethod
+    def _visit_field(cls, specification, callback):
+        return {'item': callback(specification['item'])}
+
+class Structure(Field):
+    """A field for structures of key/value pairs.
+
+    A structure is defined with an explicit set of keys, each with a :class:`Field` value
+    specifying the potential value for that key. 
+
+    Structures can be polymorphic, such that a discriminator value within a candidate value
+    is used to determine the structure variant to be used to parse the rest of the candidate
+    value. To define a polymorphic structure, ``polymorphic_on`` needs to be specified and
+    ``structure`` needs to be nested accordingly.
+
+    :param dict structure: A ``dict`` containing ``string`` keys and :class:`Field` values
+        which describes the structure of this field. When polymorphic, ``structure`` should
+        be a 
+
+    :param boolean strict: Optional, default is ``True``; if ``False``, key/value pairs
+        which are not defined in ``structure`` will be silently ignored during validation
         instead of causing a :exc:`ValidationError` to be raised.
 
     :param Field polymorphic_on: Optional, default is ``None``; if specified, should be
@@ -1641,40 +2425,6 @@ class Structure(Field):
     def polymorphic(self):
         return (self.polymorphic_on is not None)
 
-    def describe(self, parameters=None, verbose=False):
-        polymorphic_on = self.polymorphic_on
-        if polymorphic_on:
-            default = None
-            if self.default:
-                identity = self.default.get(polymorphic_on.name)
-                if identity is not None:
-                    definition = self.structure.get(identity)
-                    if definition:
-                        default = self._describe_default(definition, self.default)
-                    else:
-                        raise Exception()
-                else:
-                    raise Exception()
-
-            structure = {}
-            for identity, candidate in self.structure.iteritems():
-                identity = polymorphic_on._serialize_value(identity)
-                structure[identity] = self._describe_structure(candidate, parameters, verbose)
-
-            return super(Structure, self).describe(parameters, verbose,
-                default=default,
-                polymorphic_on=polymorphic_on.describe(parameters, verbose),
-                structure=structure)
-        else:
-            default = None
-            if self.default:
-                default = self._describe_default(self.structure, self.default)
-
-            return super(Structure, self).describe(parameters, verbose,
-                default=default,
-                polymorphic_on=None,
-                structure=self._describe_structure(self.structure, parameters, verbose))
-
     def extend(self, structure):
         """Constructs a clone of this field extended with the fields specified
         in ``structure``."""
@@ -1684,8 +2434,9 @@ class Structure(Field):
             if not isinstance(field, Field):
                 raise TypeError(field)
             if field.name != name:
-                field.name = name
+                field = field.clone(name=name)
             extension.structure[name] = field
+
         return extension
 
     def extract(self, subject, strict=True, sparse=True, **params):
@@ -1722,17 +2473,13 @@ class Structure(Field):
         return extraction
 
     def filter(self, exclusive=False, **params):
-        if not super(Structure, self).filter(exclusive, **params):
-            return None
+        """Filters this field and its structure based on the tests given in ``params``.
+        Filtered views are cached for each combination of ``exclusive`` and ``params`` until
+        the field tree of this field is modified, so the returned view, and every view within
+        it, is shared between calls and cannot be modified; a modifiable copy of a view can
+        be obtained with :meth:`clone`."""
 
-        if self.polymorphic_on:
-            structure = {}
-            for identity, candidate in self.structure.iteritems():
-                structure[identity] = self._filter_structure(candidate, exclusive, params)
-        else:
-            structure = self._filter_structure(self.structure, exclusive, params)
-        
-        return self.clone(structure=structure)
+        return self._get_filtered_view(exclusive, params, self._filter)
 
     def generate_default(self, sparse=True):
         if self.polymorphic:
@@ -1762,7 +2509,9 @@ class Structure(Field):
             raise ValueError(field)
         if field.name in self.structure and not overwrite:
             return
+
         self.structure[field.name] = field
+        self.invalidate_caches()
 
     def instantiate(self, value, key=None):
         if value is None:
@@ -1796,6 +2545,7 @@ class Structure(Field):
         return interpolation
 
     def merge(self, structure, prefer=False):
+        self.invalidate_caches()
         for name, field in structure.iteritems():
             if not isinstance(field, Field):
                 raise TypeError(field)
@@ -1805,9 +2555,13 @@ class Structure(Field):
                 field = field.clone(name=name)
             self.structure[name] = field
 
-    def process(self, value, phase=INCOMING, serialized=False, ancestry=None, partial=False):
-        if not ancestry:
-            ancestry = [self.guaranteed_name]
+    def process(self, value, phase=INCOMING, serialized=False, ancestry=None, partial=False,
+            max_errors=None):
+
+        if max_errors is not None:
+            ancestry = self._limit_errors(ancestry, max_errors)
+        elif ancestry is None:
+            ancestry = (None, self.guaranteed_name, '%s')
 
         if self._is_null(value, ancestry):
             return None
@@ -1826,7 +2580,7 @@ class Structure(Field):
             identity = value.get(polymorphic_on.name)
             if identity is not None:
                 identity = polymorphic_on.process(identity, phase, serialized,
-                    ancestry + ['.' + polymorphic_on.name])
+                    (ancestry, polymorphic_on.name, '.%s'))
             else:
                 raise ValidationError(identity=ancestry, field=self).construct('required',
                     name=polymorphic_on.name)
@@ -1862,6 +2616,8 @@ class Structure(Field):
                 valid = False
                 structure[name] = ValidationError(identity=ancestry, field=self).construct(
                     'required', name=name)
+                if tally_errors(ancestry):
+                    break
                 continue
             else:
                 continue
@@ -1871,16 +2627,20 @@ class Structure(Field):
 
             try:
                 structure[name] = field.process(field_value, phase, serialized,
-                    ancestry + ['.' + name])
+                    (ancestry, name, '.%s'))
             except StructuralError, exception:
                 valid = False
                 structure[name] = exception
-
-        if self.strict:
-            for name in names:
-                valid = False
-                structure[name] = ValidationError(identity=ancestry, field=self).construct(
-                    'unknown', name=name)
+                if tally_errors(ancestry, len(exception.errors)):
+                    break
+        else:
+            if self.strict:
+                for name in names:
+                    valid = False
+                    structure[name] = ValidationError(identity=ancestry, field=self).construct(
+                        'unknown', name=name)
+                    if tally_errors(ancestry):
+                        break
 
         if valid:
             return structure
@@ -1899,12 +2659,31 @@ class Structure(Field):
             if not isinstance(field, Field):
                 raise TypeError(field)
             if field.name != name:
-                field.name = name
+                field = field.clone(name=name)
             if name in replacement.structure:
                 replacement.structure[name] = field
 
         return replacement
 
+    def resolve(self, subject, parameters=None, interpolator=None):
+        """Interpolates ``subject``, a ``dict`` of values for this structure which may
+        reference one another as well as ``parameters``, as :meth:`interpolate` would if
+        repeatedly applied to ``subject`` using its own values until they no longer changed.
+        Each value is interpolated exactly once, after the values it references, and
+        :exc:`CyclicParameterError` is raised if values reference one another cyclically."""
+
+        if subject is None:
+            return subject
+        if not isinstance(subject, dict):
+            raise ValueError(subject)
+
+        definition = self._get_definition(subject)
+        subject = dict((name, value) for name, value in subject.iteritems() if name in definition)
+
+        def interpolate(name, value, parameters):
+            return definition[name].interpolate(value, parameters, interpolator)
+        return resolve_parameters(subject, interpolate, parameters, interpolator)
+
     def transform(self, transformer):
         candidate = transformer(self)
         if isinstance(candidate, Field):
@@ -1928,12 +2707,191 @@ class Structure(Field):
         else:
             return self
 
+    def _compile_plan(self, phase, serialized):
+        if self._overrides(Structure, 'process'):
+            return self._compile_fallback(phase, serialized)
+
+        field = self
+        custom_null = self._overrides(Field, '_is_null')
+        incoming = (phase == INCOMING)
+        is_null = self._is_null
+        ordered = bool(self.key_order)
+        polymorphic_on = self.polymorphic_on
+        preprocessor = self.preprocessor
+        strict = self.strict
+
+        def compile_definition(definition, key_order):
+            entries = []
+            for name in (key_order or definition.iterkeys()):
+                subfield = definition[name]
+                entries.append((name, self._compile_subfield(subfield, phase, serialized),
+                    subfield.required, subfield.default is not None, subfield.get_default,
+                    subfield.ignore_null))
+            return entries
+
+        if polymorphic_on:
+            polymorphic_name = polymorphic_on.name
+            polymorphic_plan = polymorphic_on._compile(phase, serialized)
+
+            definitions = {}
+            for identity, candidate in self.structure.iteritems():
+                key_order = None
+                if ordered and identity:
+                    key_order = self.key_order[identity]
+                elif ordered:
+                    key_order = self.key_order
+                definitions[identity] = compile_definition(candidate, key_order)
+        else:
+            entries = compile_definition(self.structure, self.key_order)
+
+        def construct(value, definition):
+            if ordered:
+                structure = OrderedDict()
+            else:
+                structure = {}
+
+            matched = 0
+            for name, subplan, required, has_default, get_default, ignore_null in definition:
+                if name in value:
+                    matched += 1
+                    field_value = value[name]
+                elif incoming and has_default:
+                    field_value = get_default()
+                elif required:
+                    raise StructuralError()
+                else:
+                    continue
+
+                if ignore_null and field_value is None:
+                    continue
+                structure[name] = subplan(field_value, None)
+
+            if strict and matched != len(value):
+                raise StructuralError()
+            return structure
+
+        def collect(value, definition, ancestry):
+            valid = True
+            names = set(value.keys())
+
+            if ordered:
+                structure = OrderedDict()
+            else:
+                structure = {}
+
+            for name, subplan, required, has_default, get_default, ignore_null in definition:
+                if name in names:
+                    names.remove(name)
+                    field_value = value[name]
+                elif incoming and has_default:
+                    field_value = get_default()
+                elif required:
+                    valid = False
+                    structure[name] = ValidationError(identity=ancestry, field=field).construct(
+                        'required', name=name)
+                    if tally_errors(ancestry):
+                        break
+                    continue
+                else:
+                    continue
+
+                if ignore_null and field_value is None:
+                    continue
+
+                try:
+                    structure[name] = subplan(field_value, (ancestry, name, '.%s'))
+                except StructuralError, exception:
+                    valid = False
+                    structure[name] = exception
+                    if tally_errors(ancestry, len(exception.errors)):
+                        break
+            else:
+                if strict:
+                    for name in names:
+                        valid = False
+                        structure[name] = ValidationError(identity=ancestry, field=field).construct(
+                            'unknown', name=name)
+                        if tally_errors(ancestry):
+                            break
+
+            if valid:
+                return structure
+            else:
+                raise ValidationError(identity=ancestry, field=field, value=value, structure=structure)
+
+        def plan(value, ancestry):
+            if value is None or custom_null:
+                if is_null(value, ancestry):
+                    return None
+            if not isinstance(value, dict):
+                raise InvalidTypeError(identity=ancestry, field=field, value=value).construct('invalid')
+            if preprocessor:
+                value = preprocessor(value)
+
+            if polymorphic_on:
+                identity = value.get(polymorphic_name)
+                if identity is not None:
+                    identity = polymorphic_plan(identity, (ancestry, polymorphic_name, '.%s'))
+                else:
+                    raise ValidationError(identity=ancestry, field=field).construct('required',
+                        name=polymorphic_name)
+
+                definition = definitions.get(identity)
+                if not definition:
+                    raise ValidationError(identity=ancestry, field=field, value=identity).construct('unrecognized')
+            else:
+                definition = entries
+
+            # collect reuses the preprocessed value, but reprocesses every subfield from
+            # scratch, so preprocessors and defaults within an invalid value run again
+            try:
+                return construct(value, definition)
+            except StructuralError:
+                if ancestry is None:
+                    raise StructuralError()
+            return collect(value, definition, ancestry)
+        return plan
+
     def _define_undefined_field(self, field, name):
         identity, name = name
         if self.polymorphic_on:
             self.structure[identity][name] = field.clone(name=name)
         else:
             self.structure[name] = field.clone(name=name)
+        self.invalidate_caches()
+
+    def _describe(self, parameters, verbose, **params):
+        polymorphic_on = self.polymorphic_on
+        if polymorphic_on:
+            default = None
+            if self.default:
+                identity = self.default.get(polymorphic_on.name)
+                if identity is not None:
+                    definition = self.structure.get(identity)
+                    if definition:
+                        default = self._describe_default(definition, self.default)
+                    else:
+                        raise Exception()
+                else:
+                    raise Exception()
+
+            structure = {}
+            for identity, candidate in self.structure.iteritems():
+                identity = polymorphic_on._serialize_value(identity)
+                structure[identity] = self._describe_structure(candidate, parameters, verbose)
+
+            params.update(default=default,
+                polymorphic_on=polymorphic_on.describe(parameters, verbose),
+                structure=structure)
+            return super(Structure, self)._describe(parameters, verbose, **params)
+        else:
+            default = None
+            if self.default:
+                default = self._describe_default(self.structure, self.default)
+
+            params.update(default=default, polymorphic_on=None,
+                structure=self._describe_structure(self.structure, parameters, verbose))
+            return super(Structure, self)._describe(parameters, verbose, **params)
 
     def _describe_default(self, structure, default):
         description = {}
@@ -1950,6 +2908,19 @@ class Structure(Field):
                 raise SchemeError()
         return description
 
+    def _filter(self, exclusive, params):
+        if not super(Structure, self).filter(exclusive, **params):
+            return None
+
+        if self.polymorphic_on:
+            structure = {}
+            for identity, candidate in self.structure.iteritems():
+                structure[identity] = self._filter_structure(candidate, exclusive, params)
+        else:
+            structure = self._filter_structure(self.structure, exclusive, params)
+
+        return self.clone(structure=structure)
+
     def _filter_structure(self, structure, exclusive, params):
         filtered = {}
         for name, field in structure.iteritems():
@@ -1958,6 +2929,14 @@ class Structure(Field):
                 filtered[name] = field
         return filtered
 
+    def _freeze(self):
+        if self.polymorphic_on:
+            self.structure = ReadOnlyDict((identity, ReadOnlyDict(candidate))
+                for identity, candidate in self.structure.iteritems())
+        else:
+            self.structure = ReadOnlyDict(self.structure)
+        super(Structure, self)._freeze()
+
     def _generate_default_values(self, structure, sparse=False):
         default = {}
         for name, field in structure.iteritems():
@@ -1992,6 +2971,43 @@ class Structure(Field):
             else:
                 raise ValueError(value)
 
+    def _prepare_interpolation(self, subject, interpolator):
+        if not isinstance(subject, dict) or self._overrides(Structure, 'interpolate'):
+            return super(Structure, self)._prepare_interpolation(subject, interpolator)
+
+        try:
+            definition = self._get_definition(subject)
+        except Exception:
+            return self._prepare_fallback(subject, interpolator)
+
+        interpolation = {}
+        plans = []
+
+        for name, field in definition.iteritems():
+            try:
+                value = subject[name]
+            except KeyError:
+                continue
+
+            value, plan = field._prepare_interpolation(value, interpolator)
+            if plan:
+                plans.append((name, plan))
+            else:
+                interpolation[name] = value
+
+        if not plans:
+            return interpolation, None
+
+        def plan(parameters):
+            values = interpolation.copy()
+            for name, interpolate in plans:
+                try:
+                    values[name] = interpolate(parameters)
+                except UndefinedValueError:
+                    continue
+            return values
+        return None, plan
+
     def _prevalidate_structure(self, structure, identity=None):
         if not isinstance(structure, dict):
             raise SchemeError('structure must be a dict')
@@ -2008,7 +3024,29 @@ class Structure(Field):
             if not isinstance(field, Field):
                 raise SchemeError('structure values must be Field instances')
             if not field.name:
-                field.name = name
+                if '_frozen' in field.__dict__:
+                    field = structure[name] = field.clone(name=name)
+                else:
+                    field.name = name
+
+    def _stream_value(self, value, ancestry):
+        if self.polymorphic_on or self.preprocessor or self._overrides(Structure, 'process'):
+            return self.process(value, OUTGOING, True, ancestry)
+        if self._is_null(value, ancestry):
+            return None
+        if not isinstance(value, dict):
+            raise InvalidTypeError(identity=ancestry, field=self, value=value).construct('invalid')
+
+        definition = self.structure
+        for name, field in definition.iteritems():
+            if field.required and name not in value:
+                return self.process(value, OUTGOING, True, ancestry)
+        if self.strict:
+            for name in value:
+                if name not in definition:
+                    return self.process(value, OUTGOING, True, ancestry)
+
+        return StreamedStructure(definition, self.key_order or definition, value, ancestry)
 
     @classmethod
     def _visit_field(cls, specification, callback):
@@ -2103,6 +3141,7 @@ class Text(Field):
     """
 
     basetype = 'text'
+    is_html = HTML_EXPR
     parameters = {'max_length': None, 'min_length': None, 'strip': True}
     pattern = None
 
@@ -2119,7 +3158,6 @@ class Text(Field):
             nonempty=False, **params):
 
         self.escape_html_entities = params.get('escape_html_entities', True)
-        self.is_html = re.compile('<[^<]+?>')
         self.strip = strip
         if nonempty:
             params.update(required=True, nonnull=True)
@@ -2161,6 +3199,25 @@ class Text(Field):
         else:
             return interpolate_parameters(subject, parameters, interpolator)
 
+    def _compile_validation(self, unserialize, validate):
+        plan = super(Text, self)._compile_validation(unserialize, validate)
+        if (self.min_length is not None or self.max_length is not None or self.pattern
+                or self._overrides(Field, '_is_null') or self._overrides(Text, '_validate_value')):
+            return plan
+
+        escape_html_entities = self.escape_html_entities
+        strip = self.strip
+
+        def shortcut(value, ancestry):
+            if type(value) is not unicode:
+                return plan(value, ancestry)
+            if strip:
+                value = value.strip()
+            if escape_html_entities and contains_html(value):
+                value = escape(value)
+            return value
+        return shortcut
+
     def _validate_value(self, value, ancestry):
         if not isinstance(value, basestring):
             raise InvalidTypeError(identity=ancestry, field=self, value=value).construct('invalid')
@@ -2186,9 +3243,8 @@ class Text(Field):
         if self.pattern and not self.pattern.match(value):
             raise ValidationError(identity=ancestry, field=self, value=value).construct('pattern')
 
-        if self.escape_html_entities:
-            if self.is_html.search(value):
-                value = escape(value)
+        if self.escape_html_entities and contains_html(value):
+            value = escape(value)
         return value
 
 class Time(Field):
@@ -2338,23 +3394,6 @@ class Tuple(Field):
     def __repr__(self):
         return super(Tuple, self).__repr__(['values=%r' % (self.values,)])
 
-    def describe(self, parameters=None, verbose=False):
-        values = []
-        for value in self.values:
-            if isinstance(value, Field):
-                values.append(value.describe(parameters, verbose))
-            else:
-                raise SchemeError()
-
-        default = None
-        if self.default:
-            default = []
-            for field, value in zip(self.values, self.default):
-                default.append(field.process(value, OUTGOING, True))
-            default = tuple(default)
-
-        return super(Tuple, self).describe(parameters, verbose, values=values, default=default)
-
     def extract(self, subject, strict=True, sparse=True, **params):
         if params and not self.screen(**params):
             raise FieldExcludedError(self)
@@ -2397,9 +3436,11 @@ class Tuple(Field):
             interpolation.append(definition.interpolate(subject[i], parameters, interpolator))
         return tuple(interpolation)
 
-    def process(self, value, phase=INCOMING, serialized=False, ancestry=None):
-        if not ancestry:
-            ancestry = [self.guaranteed_name]
+    def process(self, value, phase=INCOMING, serialized=False, ancestry=None, max_errors=None):
+        if max_errors is not None:
+            ancestry = self._limit_errors(ancestry, max_errors)
+        elif ancestry is None:
+            ancestry = (None, self.guaranteed_name, '%s')
 
         if self._is_null(value, ancestry):
             return None
@@ -2418,10 +3459,12 @@ class Tuple(Field):
 
         for i, field in enumerate(values):
             try:
-                sequence.append(field.process(value[i], phase, serialized, ancestry + ['[%s]' % i]))
+                sequence.append(field.process(value[i], phase, serialized, (ancestry, i, '[%s]')))
             except StructuralError, exception:
                 valid = False
                 sequence.append(exception)
+                if tally_errors(ancestry, len(exception.errors)):
+                    break
 
         if valid:
             return tuple(sequence)
@@ -2451,8 +3494,94 @@ class Tuple(Field):
         else:
             return self
 
+    def _compile_plan(self, phase, serialized):
+        if self._overrides(Tuple, 'process'):
+            return self._compile_fallback(phase, serialized)
+
+        field = self
+        custom_null = self._overrides(Field, '_is_null')
+        is_null = self._is_null
+        preprocessor = self.preprocessor
+
+        plans = [self._compile_subfield(value, phase, serialized) for value in self.values]
+        length = len(plans)
+
+        def plan(value, ancestry):
+            if value is None or custom_null:
+                if is_null(value, ancestry):
+                    return None
+            if not isinstance(value, (list, tuple)):
+                raise InvalidTypeError(identity=ancestry, field=field, value=value).construct('invalid')
+            if preprocessor:
+                value = preprocessor(value)
+            if len(value) != length:
+                raise ValidationError(identity=ancestry, field=field, value=value).construct(
+                    'length', length=length)
+
+            try:
+                return tuple([subplan(value[i], None) for i, subplan in enumerate(plans)])
+            except StructuralError:
+                if ancestry is None:
+                    raise StructuralError()
+
+            valid = True
+            sequence = []
+
+            for i, subplan in enumerate(plans):
+                try:
+                    sequence.append(subplan(value[i], (ancestry, i, '[%s]')))
+                except StructuralError, exception:
+                    valid = False
+                    sequence.append(exception)
+                    if tally_errors(ancestry, len(exception.errors)):
+                        break
+
+            if valid:
+                return tuple(sequence)
+            else:
+                raise ValidationError(identity=ancestry, field=field, value=value, structure=sequence)
+        return plan
+
     def _define_undefined_field(self, field, idx):
         self.values = tuple(list(self.values[:idx]) + [field] + list(self.values[idx + 1:]))
+        self.invalidate_caches()
+
+    def _describe(self, parameters, verbose, **params):
+        values = []
+        for value in self.values:
+            if isinstance(value, Field):
+                values.append(value.describe(parameters, verbose))
+            else:
+                raise SchemeError()
+
+        default = None
+        if self.default:
+            default = []
+            for field, value in zip(self.values, self.default):
+                default.append(field.process(value, OUTGOING, True))
+            default = tuple(default)
+
+        params.update(values=values, default=default)
+        return super(Tuple, self)._describe(parameters, verbose, **params)
+
+    def _prepare_interpolation(self, subject, interpolator):
+        if (not isinstance(subject, (list, tuple)) or len(subject) < len(self.values)
+                or self._overrides(Tuple, 'interpolate')):
+            return super(Tuple, self)._prepare_interpolation(subject, interpolator)
+
+        entries = [definition._prepare_interpolation(subject[i], interpolator)
+            for i, definition in enumerate(self.values)]
+        if not any(plan for value, plan in entries):
+            return tuple(value for value, plan in entries), None
+
+        def plan(parameters):
+            interpolation = []
+            for value, interpolate in entries:
+                if interpolate:
+                    value = interpolate(parameters)
+                interpolation.append(value)
+            return tuple(interpolation)
+        return None, plan
 
     @classmethod
     def _visit_field(cls, specification, callback):
@@ -2494,24 +3623,17 @@ class Union(Field):
 
         self.fields = tuple(stack)
 
-    def describe(self, parameters=None, verbose=False):
-        fields = []
-        for field in self.fields:
-            if isinstance(field, Field):
-                fields.append(field.describe(parameters, verbose))
-            else:
-                raise SchemeError()
-        return super(Union, self).describe(parameters, verbose, fields=fields)
-
     def instantiate(self, value):
         raise NotImplementedError()
 
     def interpolate(self, subject, parameters, interpolator=None):
         raise NotImplementedError()
 
-    def process(self, value, phase=INCOMING, serialized=False, ancestry=None):
-        if not ancestry:
-            ancestry = [self.guaranteed_name]
+    def process(self, value, phase=INCOMING, serialized=False, ancestry=None, max_errors=None):
+        if max_errors is not None:
+            ancestry = self._limit_errors(ancestry, max_errors)
+        elif ancestry is None:
+            ancestry = (None, self.guaranteed_name, '%s')
         if self._is_null(value, ancestry):
             return None
 
@@ -2523,8 +3645,42 @@ class Union(Field):
         else:
             raise InvalidTypeError(identity=ancestry, field=self, value=value).construct('invalid')
 
+    def _compile_plan(self, phase, serialized):
+        if self._overrides(Union, 'process'):
+            return self._compile_fallback(phase, serialized)
+
+        field = self
+        custom_null = self._overrides(Field, '_is_null')
+        is_null = self._is_null
+        plans = [self._compile_subfield(candidate, phase, serialized) for candidate in self.fields]
+
+        def plan(value, ancestry):
+            if value is None or custom_null:
+                if is_null(value, ancestry):
+                    return None
+
+            for subplan in plans:
+                try:
+                    return subplan(value, ancestry)
+                except InvalidTypeError:
+                    pass
+            else:
+                raise InvalidTypeError(identity=ancestry, field=field, value=value).construct('invalid')
+        return plan
+
     def _define_undefined_field(self, field, idx):
         self.fields = tuple(list(self.fields[:idx]) + [field] + list(self.fields[idx + 1:]))
+        self.invalidate_caches()
+
+    def _describe(self, parameters, verbose, **params):
+        fields = []
+        for field in self.fields:
+            if isinstance(field, Field):
+                fields.append(field.describe(parameters, verbose))
+            else:
+                raise SchemeError()
+        params.update(fields=fields)
+        return super(Union, self)._describe(parameters, verbose, **params)
 
     @classmethod
     def _visit_field(cls, specification, callback):
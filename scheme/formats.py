@@ -1,8 +1,13 @@
 import os
 import re
-from csv import Dialect, DictWriter, QUOTE_ALL
+from codecs import getincrementaldecoder
+from collections import Mapping, Sequence, Set
+from csv import Dialect, DictWriter, QUOTE_ALL, reader as csv_reader
 from cStringIO import StringIO
 from datetime import date, datetime, time
+from itertools import chain, izip
+from shutil import copyfileobj
+from tempfile import SpooledTemporaryFile
 from textwrap import TextWrapper
 from urllib import urlencode
 
@@ -12,11 +17,6 @@ except ImportError:
     class OrderedDict(object):
         pass
 
-try:
-    import json
-except ImportError:
-    from scheme import json
-
 try:
     from urlparse import parse_qsl
 except ImportError:
@@ -32,7 +32,7 @@ try:
 except ImportError:
     etree = None
 
-from scheme.util import construct_all_list, traverse_to_key
+from scheme.util import OUTGOING, construct_all_list, import_object, traverse_to_key
 
 class FormatMeta(type):
     def __new__(metatype, name, bases, namespace):
@@ -61,28 +61,50 @@ class Format(object):
     extensions = None
     mimetype = None
     name = None
+    spooling_threshold = 1048576
+    streaming = False
 
     @classmethod
-    def read(cls, path, quiet=False, **params):
+    def identify(cls, path, format=None):
+        """Identifies the format to use for ``path``, which is either the path to a file or
+        a file-like object: the format named by ``format``, if specified; otherwise this
+        format, if it is a concrete format; otherwise the format indicated by the extension
+        of ``path``."""
+
+        if format:
+            return cls.formats[format]
+        if cls.name:
+            return cls
+
+        if not isinstance(path, basestring):
+            path = getattr(path, 'name', None) or ''
+
+        extension = os.path.splitext(path)[-1].lower()
+        if extension in cls.formats:
+            return cls.formats[extension]
+        else:
+            raise ValueError(path)
+
+    @classmethod
+    def read(cls, path, quiet=False, format=None, **params):
+        """Reads and unserializes the content of ``path``, which is either the path to a
+        file or a file-like object, using :meth:`unserialize_from`."""
+
         if not path:
             raise ValueError(path)
+        if not isinstance(path, basestring):
+            return cls.identify(path, format).unserialize_from(path, **params)
+
         if not os.path.exists(path):
             if quiet:
                 return False
             else:
                 raise ValueError(path)
 
-        format = cls
-        if not cls.name:
-            extension = os.path.splitext(path)[-1].lower()
-            if extension in cls.formats:
-                format = cls.formats[extension]
-            else:
-                raise Exception()
-
-        openfile = open(path)
+        format = cls.identify(path, format)
+        openfile = open(path, 'rb')
         try:
-            return format.unserialize(openfile.read(), **params)
+            return format.unserialize_from(openfile, **params)
         finally:
             openfile.close()
 
@@ -90,41 +112,364 @@ class Format(object):
     def serialize(cls, value):
         raise NotImplementedError()
 
+    @classmethod
+    def serialize_stream(cls, value, fileobj, **params):
+        """Serializes ``value`` to the file-like ``fileobj`` incrementally, writing the
+        serialization in chunks as it is produced. Only formats which support streaming
+        implement this, and indicate so with ``streaming``."""
+
+        raise NotImplementedError()
+
+    @classmethod
+    def serialize_to(cls, value, fileobj, **params):
+        """Serializes ``value`` to the file-like ``fileobj``. Formats which support streaming
+        write the serialization in chunks as it is produced; otherwise, it is written in full
+        once produced."""
+
+        if cls.streaming:
+            cls.serialize_stream(value, fileobj, **params)
+        else:
+            fileobj.write(cls.serialize(value, **params))
+
     @classmethod
     def unserialize(cls, value):
         raise NotImplementedError()
 
+    @classmethod
+    def unserialize_from(cls, fileobj, **params):
+        """Unserializes a value from the content of the file-like ``fileobj``."""
+
+        return cls.unserialize(fileobj.read(), **params)
+
+    @classmethod
+    def unserialize_stream(cls, fileobj, **params):
+        """Unserializes a sequence of values from the file-like ``fileobj`` incrementally,
+        yielding each value as soon as it has been read. Only formats which support streaming
+        implement this."""
+
+        raise NotImplementedError()
+
     @classmethod
     def write(cls, path, value, format=None, **params):
-        if not format:
-            format = os.path.splitext(path)[-1].lower()
+        """Serializes ``value`` to ``path``, which is either the path to a file or a
+        file-like object, using :meth:`serialize_to`. The serialization is first written
+        to a temporary file, held in memory up to ``spooling_threshold`` bytes, and only
+        copied to the file at ``path`` once serialization succeeds, so an existing file is
+        left intact if serialization fails."""
 
-        openfile = open(path, 'w+')
+        format = cls.identify(path, format)
+        if not isinstance(path, basestring):
+            return format.serialize_to(value, path, **params)
+
+        temporary = SpooledTemporaryFile(cls.spooling_threshold)
         try:
-            openfile.write(cls.formats[format].serialize(value, **params))
+            format.serialize_to(value, temporary, **params)
+            temporary.seek(0)
+
+            openfile = open(path, 'wb')
+            try:
+                copyfileobj(temporary, openfile)
+            finally:
+                openfile.close()
         finally:
-            openfile.close()
+            temporary.close()
 
 class Json(Format):
+    """The json format. Values are serialized by an encoder and unserialized by a decoder,
+    each constructed from a module compatible with the standard ``json`` module and
+    configured with ``encoder_options`` (and likewise, ``decoder_options``) to produce and
+    accept exactly what the bundled ``scheme.json`` does; a module which does not support
+    these options is never used. When this module is imported, the first module listed in
+    ``encoders`` (and likewise, ``decoders``) which is installed, supports these options
+    and has its C accelerations available is selected; if none is accelerated, the first
+    such module is selected instead. The ``SCHEME_JSON_BACKEND`` environment variable, or
+    :meth:`select_backend`, overrides this choice."""
+
     extensions = ['.json']
     mimetype = 'application/json'
     name = 'json'
+    streaming = True
+
+    batch_size = 256
+    decoder = None
+    decoder_options = {'parse_constant': {'NaN': float('nan'), 'Infinity': float('inf'),
+        '-Infinity': float('-inf')}.__getitem__}
+    decoders = ['simplejson', 'json', 'scheme.json']
+    encoder = None
+    encoder_options = {'allow_nan': True, 'namedtuple_as_object': True, 'use_decimal': True}
+    encoders = ['simplejson', 'scheme.json']
+    streaming_depth = 2
+
+    DELIMITERS = u' \t\n\r,]'
+    ELEMENT_CONTENT_EXPR = re.compile(r'(?:[^"\[\]{},]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+    NESTED_CONTENT_EXPR = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+    QUOTED_CONTENT_EXPR = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+    WHITESPACE_EXPR = re.compile(r'[ \t\n\r]*')
+
+    @classmethod
+    def select_backend(cls, name=None):
+        """Selects the encoder and decoder used by this format, either constructed from the
+        module named by ``name`` for both or, if not specified, from the fastest suitable
+        modules available."""
+
+        if name:
+            module = import_object(name)
+            encoder = cls._construct_backend(module, 'JSONEncoder', cls.encoder_options)
+            decoder = cls._construct_backend(module, 'JSONDecoder', cls.decoder_options)
+            if encoder is None or decoder is None:
+                raise ValueError('json module %r does not support the required options' % name)
+            cls.encoder, cls.decoder = encoder, decoder
+        else:
+            cls.encoder = cls._select_backend(cls.encoders, 'JSONEncoder', cls.encoder_options)
+            cls.decoder = cls._select_backend(cls.decoders, 'JSONDecoder', cls.decoder_options)
 
     @classmethod
     def serialize(cls, value):
-        return json.dumps(value)
+        return cls.encoder.encode(value)
+
+    @classmethod
+    def serialize_stream(cls, value, fileobj, buffersize=65536):
+        """Serializes ``value`` to the file-like ``fileobj`` incrementally, writing roughly
+        ``buffersize`` bytes at a time. Mappings and sequences other than plain dicts, lists,
+        strings and tuples, including instances of subclasses of ``dict`` and ``list``, are
+        consumed through iteration, so that they can produce their contents lazily, as are
+        dicts and lists within the first ``streaming_depth`` levels of ``value``. Plain items
+        of such lists are serialized by the selected encoder in batches of ``batch_size``,
+        as are all other values in a single step."""
+
+        buffer, size = [], 0
+        for chunk in cls._iterencode(value, cls.encoder.encode):
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= buffersize:
+                fileobj.write(''.join(buffer))
+                buffer, size = [], 0
+
+        if buffer:
+            fileobj.write(''.join(buffer))
 
     @classmethod
     def unserialize(cls, value):
-        return json.loads(value)
+        if isinstance(value, str):
+            value = value.decode('utf8')
+        return cls.decoder.decode(value)
+
+    @classmethod
+    def unserialize_stream(cls, fileobj, chunksize=65536):
+        """Unserializes the json array contained by the file-like ``fileobj`` incrementally,
+        reading ``chunksize`` bytes at a time and yielding each element of the array as soon
+        as it has been decoded, so that only one element is held in memory at a time. An
+        element which spans several chunks is scanned for its end as each chunk is read, and
+        only decoded once it has been read in full; a malformed element raises ``ValueError``
+        at that point, without reading the remainder of the stream."""
+
+        decode = cls.decoder.raw_decode
+        decoder = getincrementaldecoder('utf8')()
+        scan = cls._scan_element
+        whitespace = cls.WHITESPACE_EXPR
+
+        def read():
+            chunk = fileobj.read(chunksize)
+            if isinstance(chunk, str):
+                return decoder.decode(chunk, not chunk), not chunk
+            return chunk, not chunk
+
+        buffer, offset, eof = u'', 0, False
+        state = 'start'
+
+        while True:
+            offset = whitespace.match(buffer, offset).end()
+            if offset < len(buffer):
+                token = buffer[offset]
+                if state == 'start':
+                    if token != '[':
+                        raise ValueError('json stream must contain an array')
+                    offset += 1
+                    state = 'first'
+                    continue
+                elif state == 'separator':
+                    if token == ',':
+                        offset += 1
+                        state = 'element'
+                        continue
+                    elif token == ']':
+                        return
+                    else:
+                        raise ValueError('expected , or ] at offset %d' % offset)
+                elif state == 'first' and token == ']':
+                    return
+
+                try:
+                    value, end = decode(buffer, offset)
+                except ValueError:
+                    end = None
+
+                if end is None or not (eof or (end < len(buffer) and buffer[end] in cls.DELIMITERS)):
+                    found, scanning = scan(buffer, offset, (0, False, False))
+                    if found is None and not eof:
+                        chunks = [buffer[offset:]]
+                        while found is None and not eof:
+                            chunk, eof = read()
+                            chunks.append(chunk)
+                            found, scanning = scan(chunk, 0, scanning)
+                        buffer, offset = u''.join(chunks), 0
+                    value, end = decode(buffer, offset)
+
+                yield value
+                offset = end
+                state = 'separator'
+                continue
+            elif eof:
+                raise ValueError('unexpected end of json stream')
+
+            chunk, eof = read()
+            buffer = buffer[offset:] + chunk
+            offset = 0
+
+    @classmethod
+    def _scan_element(cls, text, position, state):
+        depth, quoted, escaped = state
+        length = len(text)
+
+        while position < length:
+            if escaped:
+                position += 1
+                escaped = False
+            elif quoted:
+                position = cls.QUOTED_CONTENT_EXPR.match(text, position).end()
+                if position == length:
+                    break
+
+                quoted = (text[position] != '"')
+                escaped = quoted
+                position += 1
+                if not (quoted or depth):
+                    return position, (depth, quoted, escaped)
+            else:
+                if depth:
+                    position = cls.NESTED_CONTENT_EXPR.match(text, position).end()
+                else:
+                    position = cls.ELEMENT_CONTENT_EXPR.match(text, position).end()
+                if position == length:
+                    break
+
+                token = text[position]
+                position += 1
+                if token == '"':
+                    quoted = True
+                elif token in '[{':
+                    depth += 1
+                elif not depth:
+                    return position - 1, (depth, quoted, escaped)
+                else:
+                    depth -= 1
+                    if not depth:
+                        return position, (depth, quoted, escaped)
+
+        return None, (depth, quoted, escaped)
+
+    @classmethod
+    def _encode_key(cls, key, dumps):
+        if isinstance(key, basestring):
+            return dumps(key)
+        elif key is None or isinstance(key, (int, long, float)):
+            return '"%s"' % dumps(key)
+        else:
+            raise TypeError('key %r is not a string' % (key,))
+
+    @classmethod
+    def _classify(cls, value, walk):
+        value_type = type(value)
+        if value_type is dict:
+            if walk and all(isinstance(key, basestring) for key in value):
+                return 'mapping'
+        elif value_type is list:
+            if walk:
+                return 'sequence'
+        elif isinstance(value, (basestring, tuple)):
+            return None
+        elif isinstance(value, Mapping):
+            return 'mapping'
+        elif isinstance(value, Sequence):
+            return 'sequence'
+
+    @classmethod
+    def _iterencode(cls, value, dumps, depth=0):
+        walk = (depth < cls.streaming_depth)
+        kind = cls._classify(value, walk)
+        if kind == 'mapping':
+            separator = '{'
+            for key, item in value.iteritems():
+                yield '%s%s: ' % (separator, cls._encode_key(key, dumps))
+                for chunk in cls._iterencode(item, dumps, depth + 1):
+                    yield chunk
+                separator = ', '
+            yield '{}' if separator == '{' else '}'
+        elif kind == 'sequence':
+            batch, separator = [], '['
+            for item in value:
+                if cls._classify(item, False) is None:
+                    batch.append(item)
+                    if len(batch) < cls.batch_size:
+                        continue
+                    yield separator + dumps(batch)[1:-1]
+                    batch, separator = [], ', '
+                    continue
+
+                if batch:
+                    yield separator + dumps(batch)[1:-1]
+                    batch, separator = [], ', '
+
+                yield separator
+                for chunk in cls._iterencode(item, dumps, depth + 1):
+                    yield chunk
+                separator = ', '
+
+            if batch:
+                yield separator + dumps(batch)[1:-1]
+                separator = ', '
+            yield '[]' if separator == '[' else ']'
+        else:
+            yield dumps(value)
+
+    @classmethod
+    def _construct_backend(cls, module, name, options):
+        try:
+            return getattr(module, name)(**options)
+        except TypeError:
+            return None
+
+    @classmethod
+    def _select_backend(cls, candidates, name, options):
+        available = []
+        for candidate in candidates:
+            try:
+                module = import_object(candidate)
+            except ImportError:
+                continue
+
+            backend = cls._construct_backend(module, name, options)
+            if backend is None:
+                continue
+
+            decoder = getattr(module, 'decoder', None)
+            if getattr(decoder, 'c_scanstring', None) is not None:
+                return backend
+            available.append(backend)
+
+        if available:
+            return available[0]
+        else:
+            raise ImportError('no suitable json module is available')
+
+Json.select_backend(os.environ.get('SCHEME_JSON_BACKEND'))
 
 class StructuredText(Format):
     mimetype = 'text/plain'
     name = 'structuredtext'
 
-    STRUCTURE_EXPR = re.compile(
-        r'(?:\{((\\[\\\[\]\{\}])|[^\\{\[\]])*?\})|(?:\[((\\[\\\[\]\{\}])|[^\\{}\[])*?\])'
-    )
+    KEY_EXPR = re.compile(r'(?:\\[\\\[\]{}]|[^\\{}\[\],:])*:')
+    VALUE_EXPR = re.compile(r'(?:\\[\\\[\]{}]|[^\\{}\[\],])*')
     STRUCTURE_TOKENS_EXPR = re.compile(r'([{}\[\]])')
     ESCAPED_TOKENS_EXPR = re.compile(r'\\([{}\[\]])')
 
@@ -163,56 +508,75 @@ class StructuredText(Format):
             return str(content)
 
     @classmethod
-    def _unserialize_structure(cls, text, structures, parse_numbers=False):
-        head, tail = text[0], text[-1]
-        if head == '{' and tail == '}':
-            tokens = text[1:-1]
-            if tokens:
-                pairs = []
-                for pair in tokens.split(','):
-                    key, value = pair.split(':', 1)
-                    try:
-                        if value in structures:
-                            value = structures[value]
-                        else:
-                            value = cls._unserialize_simple_value(value, parse_numbers)
-                        pairs.append((key, value))
-                    except Exception:
-                        raise ValueError(value)
-
-                return dict(pairs)
+    def _unserialize_structured_value(cls, text, parse_numbers=False):
+        """Parses ``text``, a serialized structure, in a single pass. Open structures are
+        tracked on an explicit stack, so that the depth of nesting is not limited by the
+        recursion limit."""
+
+        match_key, match_value = cls.KEY_EXPR.match, cls.VALUE_EXPR.match
+        unescape = cls._unescape
+        unserialize_simple_value = cls._unserialize_simple_value
+
+        stack = []
+        position, length = 0, len(text)
+
+        while True:
+            head = text[position:position + 1]
+            if head == '{' or head == '[':
+                position += 1
+                if head == '{':
+                    value, closing = {}, '}'
+                else:
+                    value, closing = [], ']'
+
+                if text[position:position + 1] != closing:
+                    key = None
+                    if closing == '}':
+                        match = match_key(text, position)
+                        if not match:
+                            raise ValueError(text)
+                        key, position = unescape(match.group()[:-1]), match.end()
+                    stack.append([value, key, closing])
+                    continue
+                position += 1
+            elif stack:
+                match = match_value(text, position)
+                value, position = unserialize_simple_value(match.group(), parse_numbers), match.end()
             else:
-                return {}
-        elif head == '[' and tail == ']':
-            tokens = text[1:-1]
-            if tokens:
-                values = []
-                for value in tokens.split(','):
-                    if value in structures:
-                        value = structures[value]
-                    else:
-                        value = cls._unserialize_simple_value(value, parse_numbers)
-                    values.append(value)
-                return values
+                raise ValueError(text)
+
+            while stack:
+                frame = stack[-1]
+                structure, key, closing = frame
+                if key is None:
+                    structure.append(value)
+                else:
+                    structure[key] = value
+
+                delimiter = text[position:position + 1]
+                position += 1
+                if delimiter == ',':
+                    if key is not None:
+                        match = match_key(text, position)
+                        if not match:
+                            raise ValueError(text)
+                        frame[1], position = unescape(match.group()[:-1]), match.end()
+                    break
+                elif delimiter == closing:
+                    value = stack.pop()[0]
+                else:
+                    raise ValueError(text)
             else:
-                return []
-        else:
-            raise ValueError(text)
+                if position != length:
+                    raise ValueError(text)
+                return value
 
     @classmethod
-    def _unserialize_structured_value(cls, text, parse_numbers=False):
-        expr = cls.STRUCTURE_EXPR
-        structures = {}
-
-        def replace(match):
-            token = '||%d||' % len(structures)
-            structures[token] = cls._unserialize_structure(match.group(0), structures, parse_numbers)
-            return token
-            
-        while True:
-            text, count = expr.subn(replace, text)
-            if count == 0:
-                return structures[text]
+    def _unescape(cls, value):
+        if '\\' in value:
+            return cls.ESCAPED_TOKENS_EXPR.sub(r'\1', value)
+        else:
+            return value
 
     @classmethod
     def _unserialize_simple_value(cls, value, parse_numbers=False):
@@ -224,7 +588,7 @@ class StructuredText(Format):
         elif candidate == 'null':
             return None
         elif not parse_numbers:
-            return cls.ESCAPED_TOKENS_EXPR.sub(r'\1', value)
+            return cls._unescape(value)
 
         if '.' in value:
             try:
@@ -235,7 +599,7 @@ class StructuredText(Format):
         try:
             return int(value)
         except (TypeError, ValueError):
-            return value
+            return cls._unescape(value)
 
 class UrlEncoded(StructuredText):
     mimetype = 'application/x-www-form-urlencoded'
@@ -266,10 +630,15 @@ class UrlEncoded(StructuredText):
         return data
 
 class Yaml(Format):
+    """The yaml format. Values are unserialized with the safe loader of ``yaml``, backed by
+    libyaml (``CSafeLoader``) when its bindings are installed; otherwise, the pure-python
+    ``SafeLoader`` is used instead."""
+
     extensions = ['.yaml', '.yml']
     indent = '  '
     indicators = '-?:,[]{}#&*!|>\'"%@`'
     line_width = 100
+    loader = None
     mimetype = 'application/x-yaml'
     name = 'yaml'
     requires_escape = (': ', ' #')
@@ -278,14 +647,26 @@ class Yaml(Format):
 
     @classmethod
     def serialize(cls, value):
-        content = cls._serialize_value(value, 0)
-        if isinstance(content, list):
-            content = '\n'.join(content)
+        lines = []
+        content = cls._serialize_value(value, 0, lines)
+        if content is None:
+            content = '\n'.join(lines)
         return content + '\n'
 
     @classmethod
     def unserialize(cls, value):
-        return yaml.load(value)
+        return yaml.load(value, Loader=cls.loader)
+
+    @classmethod
+    def unserialize_from(cls, fileobj):
+        return yaml.load(fileobj, Loader=cls.loader)
+
+    @classmethod
+    def unserialize_stream(cls, fileobj):
+        """Unserializes each document of the multi-document yaml stream ``fileobj`` in turn,
+        yielding each document as soon as it has been loaded."""
+
+        return yaml.load_all(fileobj, Loader=cls.loader)
 
     @classmethod
     def _is_literal_text(cls, value):
@@ -321,26 +702,24 @@ class Yaml(Format):
             return False
 
     @classmethod
-    def _serialize_sequence(cls, value, level):
+    def _serialize_sequence(cls, value, level, lines):
         if not value:
             return '[]'
 
         if cls._is_simple_sequence(value):
-            return '[%s]' % ', '.join(cls._serialize_value(v, None) for v in value)
+            return '[%s]' % ', '.join(cls._serialize_value(v, None, None) for v in value)
 
         prefix = (cls.indent * level) + '-'
-        lines = []
         for v in value:
-            content = cls._serialize_value(v, level + 1)
-            if isinstance(content, list):
-                lines.append('%s %s' % (prefix, content[0].lstrip()))
-                lines.extend(content[1:])
+            first = len(lines)
+            content = cls._serialize_value(v, level + 1, lines)
+            if content is None:
+                lines[first] = '%s %s' % (prefix, lines[first].lstrip())
             else:
                 lines.append('%s %s' % (prefix, content))
-        return lines
 
     @classmethod
-    def _serialize_structure(cls, value, level):
+    def _serialize_structure(cls, value, level, lines):
         if not value:
             return '{}'
 
@@ -349,27 +728,24 @@ class Yaml(Format):
         else:
             items = sorted(value.iteritems())
 
-        lines = []
+        indent = cls.indent * level
         for k, v in items:
-            key = '%s%s:' % (cls.indent * level, k)
+            key = '%s%s:' % (indent, k)
+            first = len(lines)
             if isinstance(v, basestring):
-                content = cls._serialize_string(v, level + 1)
-                if isinstance(content, list):
-                    lines.append('%s %s' % (key, content[0].lstrip()))
-                    lines.extend(content[1:])
+                content = cls._serialize_string(v, level + 1, lines)
+                if content is None:
+                    lines[first] = '%s %s' % (key, lines[first].lstrip())
                 else:
                     lines.append('%s %s' % (key, content))
             else:
-                content = cls._serialize_value(v, level + 1)
-                if isinstance(content, list):
-                    lines.append(key)
-                    lines.extend(content)
-                else:
-                    lines.append('%s %s' % (key, content))
-        return lines
+                lines.append(key)
+                content = cls._serialize_value(v, level + 1, lines)
+                if content is not None:
+                    lines[first] = '%s %s' % (key, content)
 
     @classmethod
-    def _serialize_string(cls, value, level):
+    def _serialize_string(cls, value, level, lines):
         length = len(value)
         if length == 0:
             return "''"
@@ -378,13 +754,12 @@ class Yaml(Format):
 
         indent = cls.indent * level
         if '\n' in value:
-            lines = ['|']
+            lines.append('|')
             for line in value.split('\n'):
                 if line:
                     lines.append(indent + line)
                 else:
                     lines.append('')
-            return lines
         elif length + len(indent) <= cls.line_width:
             if cls._requires_escaping(value):
                 return "'%s'" % value.replace("'", "''")
@@ -398,21 +773,23 @@ class Yaml(Format):
                 subsequent_indent=indent, break_long_words=False,
                 replace_whitespace=False, drop_whitespace=False)
 
-            lines = []
             for line in value.splitlines():
                 lines.extend(wrapper.wrap(line))
-            return lines
 
     @classmethod
-    def _serialize_value(cls, value, level):
+    def _serialize_value(cls, value, level, lines):
+        """Serializes ``value`` at ``level`` of indentation, either returning the serialized
+        value if it can be expressed inline, or otherwise appending each line of it to
+        ``lines``, the lines of the entire serialization, and returning ``None``."""
+
         if value is None:
             return 'null'
         elif isinstance(value, (OrderedDict, dict)):
-            return cls._serialize_structure(value, level)
+            return cls._serialize_structure(value, level, lines)
         elif isinstance(value, (list, set, tuple)):
-            return cls._serialize_sequence(value, level)
+            return cls._serialize_sequence(value, level, lines)
         elif isinstance(value, basestring):
-            return cls._serialize_string(value, level)
+            return cls._serialize_string(value, level, lines)
         elif isinstance(value, bool):
             if value:
                 return 'true'
@@ -429,10 +806,16 @@ class Yaml(Format):
         else:
             raise ValueError(value)
 
+if yaml:
+    Yaml.loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 class Csv(Format):
     extensions = ['.csv']
     mimetype = 'application/csv'
     name = 'csv'
+    streaming = True
+
+    BOOLEANS = {'true': True, 'false': False}
 
     class Dialect(Dialect):
         quoting = QUOTE_ALL
@@ -444,25 +827,128 @@ class Csv(Format):
         skipinitialspace = False
 
     @classmethod
-    def serialize(cls, value, columns=None, path=None):
+    def serialize(cls, value, columns=None, path=None, schema=None, serialized=False):
+        content = StringIO()
+        cls.serialize_stream(value, content, columns, path, schema, serialized)
+        return content.getvalue()
+
+    @classmethod
+    def serialize_stream(cls, value, fileobj, columns=None, path=None, schema=None,
+            serialized=False):
+        """Serializes ``value``, an iterable of dictionaries, to the file-like ``fileobj`` as
+        rows of csv, writing each row as it is produced; nothing is written if ``value`` is
+        empty. If ``path`` is specified, ``value`` is first traversed to that key.
+
+        :param columns: Optional, default is ``None``; the keys to serialize, in column
+            order, as either a list or a comma-delimited string. If not specified, the key
+            order of ``schema`` is used, if specified, and otherwise the sorted keys of the
+            first row.
+
+        :param schema: Optional, default is ``None``; a non-polymorphic :class:`Structure`
+            describing each row. If specified, non-null values of columns with a field in
+            ``schema`` are processed as outgoing values by that field, so that, for instance,
+            ``date`` and ``decimal`` values are validated and formatted as they would be for
+            other formats.
+
+        :param boolean serialized: Optional, default is ``False``; if ``True``, the rows of
+            ``value`` have already been processed as outgoing values, so ``schema`` is only
+            used to determine the columns.
+        """
+
         if path:
             value = traverse_to_key(value, path)
-        if not isinstance(value, (list, tuple)):
+        if value is None or isinstance(value, (basestring, dict)):
             raise ValueError(value)
-        if not value:
-            return ''
+
+        rows = iter(value)
+        try:
+            first = next(rows)
+        except StopIteration:
+            return
 
         if isinstance(columns, basestring):
             columns = columns.split(',')
         if not columns:
-            columns = sorted(value[0].keys())
-
-        content = StringIO()
-        writer = DictWriter(content, columns, extrasaction='ignore', dialect=cls.Dialect)
+            if schema:
+                columns = schema.key_order or sorted(schema.structure)
+            else:
+                columns = sorted(first.keys())
 
+        writer = DictWriter(fileobj, columns, extrasaction='ignore', dialect=cls.Dialect)
         writer.writerow(dict((name, name) for name in columns))
-        writer.writerows(value)
-        return content.getvalue()
+
+        formatters = []
+        if schema and not serialized:
+            for name in columns:
+                field = schema.structure.get(name)
+                if field:
+                    formatters.append((name, field.compile(OUTGOING, True)))
+
+        if not formatters:
+            writer.writerow(first)
+            writer.writerows(rows)
+            return
+
+        for index, row in enumerate(chain((first,), rows)):
+            row, ancestry = dict(row), (None, index, '[%s]')
+            for name, formatter in formatters:
+                candidate = row.get(name)
+                if candidate is not None:
+                    row[name] = formatter(candidate, (ancestry, name, '.%s'))
+            writer.writerow(row)
+
+    @classmethod
+    def unserialize(cls, value, schema=None):
+        return list(cls.unserialize_stream(StringIO(value), schema))
+
+    @classmethod
+    def unserialize_from(cls, fileobj, schema=None):
+        return list(cls.unserialize_stream(fileobj, schema))
+
+    @classmethod
+    def unserialize_stream(cls, fileobj, schema=None):
+        """Unserializes rows of csv from the file-like ``fileobj`` incrementally, yielding
+        each row as a dictionary mapping the column names given by the first row to the
+        values of that row, as strings. Blank rows are skipped.
+
+        :param schema: Optional, default is ``None``; a non-polymorphic :class:`Structure`
+            describing each row. If specified, values of columns with a field in ``schema``
+            are prepared for unserialization by that field: empty values become ``None``,
+            except for ``text`` fields, and ``boolean`` values are parsed. Each row can then
+            be processed by ``schema``, by :meth:`Field.process_stream` for instance, to
+            coerce and validate it.
+        """
+
+        reader = csv_reader(fileobj, dialect=cls.Dialect)
+        try:
+            columns = next(reader)
+        except StopIteration:
+            return
+
+        parsers = []
+        if schema:
+            for name in columns:
+                field = schema.structure.get(name)
+                if field and field.basetype != 'text':
+                    parsers.append((name, cls._construct_parser(field)))
+
+        for row in reader:
+            if not row:
+                continue
+
+            row = dict(izip(columns, row))
+            for name, parser in parsers:
+                if name in row:
+                    row[name] = parser(row[name])
+            yield row
+
+    @classmethod
+    def _construct_parser(cls, field):
+        if field.basetype == 'boolean':
+            booleans = cls.BOOLEANS
+            return lambda value: booleans.get(value.lower(), value) if value else None
+        else:
+            return lambda value: value or None
 
 class Xml(Format):
     default_root = 'root'
@@ -470,27 +956,77 @@ class Xml(Format):
     mimetype = 'application/xml'
     name = 'xml'
     preamble = '<?xml version="1.0"?>\n'
+    streaming = True
 
     @classmethod
     def serialize(cls, value, root=None, preamble=True):
-        element = etree.Element(root or cls.default_root)
-        cls._serialize_content(value, element)
+        content = StringIO()
+        cls.serialize_stream(value, content, root, preamble)
+        return content.getvalue()
+
+    @classmethod
+    def serialize_stream(cls, value, fileobj, root=None, preamble=True, buffersize=1024):
+        """Serializes ``value`` to the file-like ``fileobj`` as an xml document, writing
+        each element as it is reached, in batches of ``buffersize`` fragments, instead of
+        first building a tree of elements. The keys of each dictionary are emitted in
+        sorted order, unless it is an ``OrderedDict``, in which case its own order is kept."""
+
+        buffer = []
+        def write(fragment):
+            buffer.append(fragment)
+            if len(buffer) >= buffersize:
+                fileobj.write(''.join(buffer))
+                del buffer[:]
 
-        serialized = etree.tostring(element)
         if preamble:
-            serialized = cls.preamble + serialized
+            write(cls.preamble)
 
-        return serialized
+        cls._serialize_content(value, root or cls.default_root, write)
+        if buffer:
+            fileobj.write(''.join(buffer))
 
     @classmethod
     def unserialize(cls, value, ignore_root=True):
-        root = etree.fromstring(value)
-        attr, value = cls._unserialize_element(root)
+        return cls._unserialize_root(etree.fromstring(value), ignore_root)
 
-        if not ignore_root:
-            value = {attr: value}
+    @classmethod
+    def unserialize_from(cls, fileobj, ignore_root=True):
+        return cls._unserialize_root(etree.parse(fileobj).getroot(), ignore_root)
 
-        return value
+    @classmethod
+    def unserialize_stream(cls, fileobj, path=None):
+        """Unserializes the child elements of an element of the xml document ``fileobj``
+        incrementally, yielding each child as soon as its end tag has been parsed. Each child
+        is discarded once it has been yielded, as is all other content of the document once
+        parsed, so that only one child is held in memory at a time.
+
+        :param string path: Optional, default is ``None``; the dotted path of tags, below
+            the root element, to the element whose children should be unserialized. If not
+            specified, the children of the root element are unserialized, which are the
+            items of a serialized list.
+        """
+
+        target = path.split('.') if path else []
+        depth = len(target) + 2
+
+        ancestors, level, matched = [], 0, False
+        for event, element in etree.iterparse(fileobj, ('start', 'end')):
+            if event == 'start':
+                level += 1
+                if level < depth:
+                    ancestors.append(element)
+                    if level == depth - 1:
+                        matched = ([e.tag for e in ancestors[1:]] == target)
+                continue
+
+            if level == depth:
+                if matched:
+                    yield cls._unserialize_element(element)[1]
+                    ancestors[-1].remove(element)
+            elif level < depth:
+                element.clear()
+                ancestors.pop()
+            level -= 1
 
     @classmethod
     def _is_list(cls, candidates):
@@ -501,39 +1037,63 @@ class Xml(Format):
             return True
 
     @classmethod
-    def _serialize_content(cls, content, element):
-        if isinstance(content, dict):
+    def _escape_text(cls, text):
+        if '&' in text:
+            text = text.replace('&', '&amp;')
+        if '<' in text:
+            text = text.replace('<', '&lt;')
+        if '>' in text:
+            text = text.replace('>', '&gt;')
+        return text.encode('us-ascii', 'xmlcharrefreplace')
+
+    @classmethod
+    def _serialize_content(cls, content, tag, write):
+        if isinstance(content, Mapping):
             if content:
-                for key, value in sorted(content.iteritems()):
-                    subelement = etree.SubElement(element, key)
-                    cls._serialize_content(value, subelement)
+                if isinstance(content, OrderedDict):
+                    items = content.iteritems()
+                else:
+                    items = ((key, content[key]) for key in sorted(content))
+
+                write('<%s>' % tag)
+                for key, value in items:
+                    cls._serialize_content(value, key, write)
+                write('</%s>' % tag)
             else:
-                element.set('type', 'struct')
-        elif isinstance(content, (list, set, tuple)):
+                write('<%s type="struct" />' % tag)
+        elif isinstance(content, (Sequence, Set)) and not isinstance(content, basestring):
             if content:
+                write('<%s>' % tag)
                 for value in content:
-                    subelement = etree.SubElement(element, '_')
-                    cls._serialize_content(value, subelement)
+                    cls._serialize_content(value, '_', write)
+                write('</%s>' % tag)
             else:
-                element.set('type', 'list')
-        elif isinstance(content, bool):
-            if content:
-                element.text = 'true'
-            else:
-                element.text = 'false'
-        elif content is None:
-            element.text = 'null'
+                write('<%s type="list" />' % tag)
         else:
-            element.text = str(content)
+            if isinstance(content, bool):
+                if content:
+                    text = 'true'
+                else:
+                    text = 'false'
+            elif content is None:
+                text = 'null'
+            elif isinstance(content, basestring):
+                text = content
+            else:
+                text = str(content)
+
+            if text:
+                write('<%s>%s</%s>' % (tag, cls._escape_text(text), tag))
+            else:
+                write('<%s />' % tag)
 
     @classmethod
     def _unserialize_element(cls, element):
         attr = element.tag
         type = element.get('type', None)
 
-        children = list(element)
-        if children:
-            children = [cls._unserialize_element(child) for child in children]
+        if len(element):
+            children = [cls._unserialize_element(child) for child in element]
             if type == 'list' or cls._is_list(children):
                 return attr, [child[1] for child in children]
             else:
@@ -572,6 +1132,13 @@ class Xml(Format):
         except (TypeError, ValueError):
             return attr, value
 
+    @classmethod
+    def _unserialize_root(cls, root, ignore_root):
+        attr, value = cls._unserialize_element(root)
+        if not ignore_root:
+            value = {attr: value}
+        return value
+
 def serialize(mimetype, value, **params):
     return Format.formats[mimetype].serialize(value, **params)
 
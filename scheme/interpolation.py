@@ -1,13 +1,19 @@
 from datetime import date
 import re
+import threading
 
 try:
     import jinja2
+    from jinja2 import meta, nodes
+    from jinja2.environment import TemplateExpression
+    from jinja2.parser import Parser
+    from jinja2.sandbox import SandboxedEnvironment
 except ImportError:
     jinja2 = None
 
-from scheme.exceptions import UndefinedParameterError
+from scheme.exceptions import CyclicParameterError, UndefinedParameterError
 from scheme.timezone import current_timestamp
+from scheme.util import LRUCache
 
 PLURALIZATION_RULES = (
     (re.compile(r'ife$'), re.compile(r'ife$'), 'ives'),
@@ -18,6 +24,16 @@ PLURALIZATION_RULES = (
     (re.compile(r'(qu|[^aeiou])y$'), re.compile(r'y$'), 'ies'),
 )
 
+LITERAL_EXPR = re.compile(u'^[^{\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*\Z')
+REFERENCE_EXPR = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*(?:[.][a-zA-Z_][a-zA-Z0-9_]*)*\Z')
+REFERENCE_TEMPLATE_EXPR = re.compile(
+    r'^[$][{]\s*([a-zA-Z_][a-zA-Z0-9_]*(?:[.][a-zA-Z_][a-zA-Z0-9_]*)*)\s*[}]\Z')
+ENVIRONMENT_SETTINGS = ('block_start_string', 'block_end_string', 'variable_start_string',
+    'variable_end_string', 'comment_start_string', 'comment_end_string', 'line_statement_prefix',
+    'line_comment_prefix', 'trim_blocks', 'lstrip_blocks', 'newline_sequence',
+    'keep_trailing_newline', 'autoescape', 'finalize', 'optimized', 'template_class')
+RESERVED_NAMES = frozenset(['and', 'else', 'false', 'False', 'if', 'in', 'is', 'none', 'None',
+    'not', 'or', 'true', 'True'])
 SPACER_EXPR = re.compile(r'[-_\s]+')
 VALID_CHARS_EXPR = re.compile(r'[^\w\s-]')
 VARIABLE_EXPR = re.compile(r'^\s*[$][{]([^}]+)[}]\s*$')
@@ -53,14 +69,42 @@ class UndefinedValueError(Exception):
     pass
 
 class Interpolator(object):
-    """The standard jinja-based template renderer."""
+    """The standard jinja-based template renderer. Compiled expressions and templates are
+    cached by source, in ``expressions`` and ``templates`` respectively, each retaining the
+    ``cache_size`` most recently used entries.
 
+    Jinja is bypassed for templates which contain no markup and no line breaks (which jinja
+    would normalize), and for expressions (or templates consisting of a single expression)
+    which merely reference a parameter, optionally followed by a dotted path of attributes
+    or keys; these are resolved directly, with the same results jinja would produce.
+
+    The code jinja compiles for each template and expression is additionally shared, in
+    ``code_cache``, between all interpolators whose environments have the same type, syntax
+    and compilation settings, extensions, filters and tests (which jinja may evaluate during
+    compilation), so an interpolator only binds already compiled code
+    to its environment when another has compiled the same source. Interpolators themselves
+    can be shared through :meth:`pooled`.
+
+    :param boolean sandboxed: Optional, default is ``False``; if ``True``, templates and
+        expressions are rendered within jinja's sandboxed environment, and references are
+        never resolved directly.
+    """
+
+    code_cache = LRUCache(1024)
     default_interpolator = None
+    lock = threading.Lock()
+    pool = LRUCache(64)
     standard_filters = [pluralize, slugify]
     standard_globals = [now, timestamp]
 
-    def __init__(self, filters=None, globals=None):
-        self.environment = jinja2.Environment( # nosec
+    def __init__(self, filters=None, globals=None, cache_size=256, sandboxed=False):
+        self.expressions = LRUCache(cache_size)
+        self.references = LRUCache(cache_size)
+        self.sandboxed = sandboxed
+        self.templates = LRUCache(cache_size)
+
+        environment = SandboxedEnvironment if sandboxed else jinja2.Environment
+        self.environment = environment( # nosec
             variable_start_string='${',
             variable_end_string='}')
 
@@ -77,11 +121,21 @@ class Interpolator(object):
     @classmethod
     def default(cls):
         if cls.default_interpolator is None:
-            cls.default_interpolator = cls()
+            with cls.lock:
+                if cls.default_interpolator is None:
+                    cls.default_interpolator = cls()
         return cls.default_interpolator
 
     def evaluate(self, subject, parameters):
-        expression = self.environment.compile_expression(subject, False)
+        if not self.sandboxed and REFERENCE_EXPR.match(subject):
+            names = subject.split('.')
+            if names[0] in parameters and names[0] not in RESERVED_NAMES:
+                return self._resolve_reference(parameters[names[0]], names[1:])
+
+        expression = self.expressions.get(subject)
+        if expression is None:
+            expression = self.expressions.put(subject, self._compile(subject, True))
+
         try:
             value = expression(**parameters)
         except jinja2.UndefinedError:
@@ -90,10 +144,110 @@ class Interpolator(object):
             raise UndefinedValueError()
         return value
 
+    def find_references(self, subject):
+        """Returns the names of the variables referenced by ``subject``, a template, as a
+        ``frozenset``; names which are only assigned within ``subject`` are excluded."""
+
+        if '{' not in subject:
+            return frozenset()
+
+        references = self.references.get(subject)
+        if references is None:
+            references = frozenset(meta.find_undeclared_variables(self.environment.parse(subject)))
+            self.references.put(subject, references)
+        return references
+
     def interpolate(self, subject, parameters):
-        template = self.environment.from_string(subject)
+        if LITERAL_EXPR.match(subject):
+            return unicode(subject)
+
+        match = not self.sandboxed and REFERENCE_TEMPLATE_EXPR.match(subject)
+        if match:
+            names = match.group(1).split('.')
+            if names[0] in parameters and names[0] not in RESERVED_NAMES:
+                try:
+                    return unicode(self._resolve_reference(parameters[names[0]], names[1:]))
+                except UndefinedValueError:
+                    pass
+
+        template = self.templates.get(subject)
+        if template is None:
+            template = self.templates.put(subject, self._compile(subject))
         return template.render(parameters)
 
+    @classmethod
+    def pooled(cls, filters=None, globals=None, sandboxed=False):
+        """Returns the interpolator shared by all callers requesting the specified
+        combination of ``filters``, ``globals`` and ``sandboxed``, constructing it on first
+        use. The ``pool`` retains the most recently used interpolators; an interpolator is
+        constructed for each call if ``globals`` contains unhashable values."""
+
+        try:
+            key = (cls, frozenset((filters or {}).iteritems()),
+                frozenset((globals or {}).iteritems()), sandboxed)
+        except TypeError:
+            return cls(filters, globals, sandboxed=sandboxed)
+
+        interpolator = cls.pool.get(key)
+        if interpolator is None:
+            with cls.lock:
+                interpolator = cls.pool.get(key)
+                if interpolator is None:
+                    interpolator = cls.pool.put(key, cls(filters, globals, sandboxed=sandboxed))
+        return interpolator
+
+    def _compile(self, subject, expression=False):
+        environment = self.environment
+        try:
+            key = (subject, expression, type(environment),
+                tuple([getattr(environment, name) for name in ENVIRONMENT_SETTINGS]),
+                frozenset(environment.extensions), frozenset(environment.filters.iteritems()),
+                frozenset(environment.tests.iteritems()))
+            hash(key)
+        except TypeError:
+            key = None
+
+        code = None
+        if key:
+            code = self.code_cache.get(key)
+
+        if code is None:
+            source = subject
+            if expression:
+                source = self._parse_expression(subject)
+            code = environment.compile(source)
+            if key:
+                self.code_cache.put(key, code)
+
+        template = environment.template_class.from_code(environment, code,
+            environment.make_globals(None), None)
+        if expression:
+            return TemplateExpression(template, False)
+        else:
+            return template
+
+    def _parse_expression(self, subject):
+        parser = Parser(self.environment, subject, state='variable')
+        expression = parser.parse_expression()
+        if not parser.stream.eos:
+            raise jinja2.TemplateSyntaxError('chunk after expression',
+                parser.stream.current.lineno, None, None)
+
+        expression.set_environment(self.environment)
+        return nodes.Template([nodes.Assign(nodes.Name('result', 'store'), expression,
+            lineno=1)], lineno=1)
+
+    def _resolve_reference(self, value, names):
+        for name in names:
+            try:
+                value = getattr(value, name)
+            except AttributeError:
+                try:
+                    value = value[name]
+                except (TypeError, LookupError, AttributeError):
+                    raise UndefinedValueError()
+        return value
+
 def interpolate_parameters(subject, parameters, interpolator=None, simple=False):
     """Interpolates ``subject``, a template, using ``parameters.``
 
@@ -124,3 +278,89 @@ def interpolate_parameters(subject, parameters, interpolator=None, simple=False)
             return subject
     else:
         return interpolator.interpolate(subject, parameters)
+
+def resolve_parameters(subject, interpolate, parameters=None, interpolator=None):
+    """Resolves ``subject``, a ``dict`` of values which may contain templates referencing
+    one another, returning a new ``dict`` of interpolated values. Each value is
+    interpolated exactly once, after all of the values it references, producing the
+    values repeated interpolation of ``subject`` against itself would converge on.
+
+    :param dict subject: The values to resolve; each value can be a template, or a
+        ``dict``, ``list`` or ``tuple`` containing templates.
+
+    :param interpolate: A callable with the signature ``(name, value, parameters)``
+        which interpolates ``value``, the value of ``name`` within ``subject``, using
+        ``parameters``; if it raises :exc:`UndefinedValueError`, ``name`` is omitted
+        from the result.
+
+    :param dict parameters: Optional, defaults to ``None``; if specified, additional
+        values available to the templates within ``subject``, which are shadowed by
+        those in ``subject``.
+
+    :param interpolator: Optional, defaults to ``None``; if specified, an
+        :cls:`Interpolator` instance to use for finding references, rather then the
+        default one.
+
+    :raises CyclicParameterError: when values within ``subject`` reference one another
+        cyclically.
+    """
+
+    interpolator = interpolator or Interpolator.default()
+    names = frozenset(subject)
+
+    dependencies = {}
+    for name, value in subject.iteritems():
+        dependencies[name] = _collect_references(value, interpolator) & names
+
+    resolved = dict(parameters or {})
+    resolution = {}
+
+    for name in _order_dependencies(dependencies):
+        try:
+            resolution[name] = resolved[name] = interpolate(name, subject[name], resolved)
+        except UndefinedValueError:
+            continue
+    return resolution
+
+def _collect_references(subject, interpolator):
+    if isinstance(subject, basestring):
+        return interpolator.find_references(subject)
+    elif isinstance(subject, dict):
+        values = subject.itervalues()
+    elif isinstance(subject, (list, tuple)):
+        values = subject
+    else:
+        return frozenset()
+
+    references = set()
+    for value in values:
+        references.update(_collect_references(value, interpolator))
+    return references
+
+def _order_dependencies(dependencies):
+    order = []
+    ordered = set()
+
+    for root in dependencies:
+        if root in ordered:
+            continue
+
+        path, active = [root], set([root])
+        stack = [iter(dependencies[root])]
+        while stack:
+            for dependency in stack[-1]:
+                if dependency in ordered:
+                    continue
+                if dependency in active:
+                    raise CyclicParameterError(path[path.index(dependency):] + [dependency])
+                path.append(dependency)
+                active.add(dependency)
+                stack.append(iter(dependencies[dependency]))
+                break
+            else:
+                stack.pop()
+                name = path.pop()
+                active.remove(name)
+                ordered.add(name)
+                order.append(name)
+    return order
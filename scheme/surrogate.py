@@ -1,5 +1,4 @@
 import scheme
-from copy import deepcopy
 from scheme.interpolation import interpolate_parameters
 from scheme.util import identify_object, import_object
 
@@ -148,7 +147,7 @@ class surrogate(dict):
 
     @classmethod
     def _interpolate_dynamic_surrogate(cls, value, parameters, interpolator):
-        schema = scheme.Field.reconstruct(deepcopy(value.pop('__schema__')))
+        schema = scheme.Field.reconstruct(value.pop('__schema__'), cached=True)
         if not schema:
             raise ValueError(value)
 
@@ -177,7 +176,7 @@ class surrogate(dict):
         if not schema:
             raise ValueError(value)
 
-        schema = scheme.Field.reconstruct(schema)
+        schema = scheme.Field.reconstruct(schema, cached=True)
         if not schema:
             raise ValueError(value)
 
@@ -1,8 +1,18 @@
 import re
 import sys
+from copy import deepcopy
+from hashlib import sha1
 from types import ClassType, ModuleType
 
+try:
+    from collections import OrderedDict
+except ImportError:
+    OrderedDict = None
+
+INCOMING = 'incoming'
 NODEFAULT = object()
+OUTGOING = 'outgoing'
+HTML_EXPR = re.compile('<[^<]+?>')
 
 import threading
 
@@ -18,6 +28,190 @@ class ThreadSafeDict(dict) :
     def __exit__(self, type, value, traceback) :
         self._lock.release()
 
+class Ancestry(object):
+    """The path to a value being processed, expressed as a chain of parent links. Structural
+    fields descend into a value by linking a plain ``(parent, key, template)`` tuple onto the
+    ancestry of their own value; such a chain is only resolved into an ancestry, and the
+    segments of the path only rendered, when an error is reported for the value.
+
+    :param key: The key of the value within its parent, rendered using ``template``.
+
+    :param parent: Optional, default is ``None``; the ancestry of the parent value, as
+        either an :class:`Ancestry`, a ``(parent, key, template)`` link or a list of
+        already rendered segments.
+
+    :param string template: Optional, default is ``'%s'``; the template used to render
+        ``key`` as a path segment.
+
+    :param limit: Optional, default is ``None``; if specified, an :class:`ErrorLimit`
+        which applies to the processing of this value and its descendants.
+
+    An ancestry concatenates with a list or tuple of segments, in either order, to produce
+    a list of segments, and with a string to produce the rendered path. It compares equal
+    to an equivalent list or tuple of segments and to its rendered path, and hashes as
+    its rendered path.
+    """
+
+    __slots__ = ('key', 'limit', 'parent', 'template')
+
+    def __init__(self, key, parent=None, template='%s', limit=None):
+        self.key = key
+        self.limit = limit
+        self.parent = parent
+        self.template = template
+
+    @classmethod
+    def resolve(cls, ancestry):
+        """Resolves ``ancestry`` into an :class:`Ancestry` if it is a ``(parent, key, template)``
+        link, returning any other value as is."""
+
+        if type(ancestry) is tuple and len(ancestry) == 3 and not isinstance(ancestry[0], basestring):
+            parent, key, template = ancestry
+            return cls(key, parent, template)
+        return ancestry
+
+    def __add__(self, other):
+        if isinstance(other, basestring):
+            return ''.join(self.segments) + other
+        return self.segments + list(other)
+
+    def __eq__(self, other):
+        if isinstance(other, (Ancestry, list, tuple)):
+            return self.segments == list(Ancestry.resolve(other))
+        elif isinstance(other, basestring):
+            return ''.join(self.segments) == other
+        return NotImplemented
+
+    def __getitem__(self, index):
+        return self.segments[index]
+
+    def __hash__(self):
+        return hash(''.join(self.segments))
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __ne__(self, other):
+        if isinstance(other, (Ancestry, list, tuple)):
+            return self.segments != list(Ancestry.resolve(other))
+        elif isinstance(other, basestring):
+            return ''.join(self.segments) != other
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, basestring):
+            return other + ''.join(self.segments)
+        return list(other) + self.segments
+
+    def __repr__(self):
+        return 'Ancestry(%r)' % ''.join(self.segments)
+
+    def __str__(self):
+        return ''.join(self.segments)
+
+    @property
+    def segments(self):
+        segments = []
+        node = self
+        while True:
+            if isinstance(node, Ancestry):
+                segment = node.template % (node.key,)
+                node = node.parent
+            elif type(node) is tuple:
+                parent, key, template = node
+                segment = template % (key,)
+                node = parent
+            else:
+                break
+            if segment:
+                segments.append(segment)
+
+        segments.reverse()
+        if node:
+            segments = list(node) + segments
+        return segments
+
+class ErrorLimit(object):
+    """A limit on the number of errors collected while processing a value, after which
+    structural fields stop descending into the value.
+
+    :param integer maximum: The number of errors which exhausts this limit.
+    """
+
+    def __init__(self, maximum):
+        self.count = 0
+        self.maximum = maximum
+
+    @property
+    def exhausted(self):
+        return self.count >= self.maximum
+
+class LRUCache(object):
+    """A bounded, thread-safe mapping which discards its least recently used entries
+    once it exceeds ``capacity`` entries.
+
+    :param integer capacity: The maximum number of entries retained by this cache.
+    """
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self.entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self.entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            entries = self.entries
+            entries.pop(key, None)
+            entries[key] = value
+            while len(entries) > self.capacity:
+                entries.popitem(False)
+        return value
+
+class ReadOnlyDict(dict):
+    """A dict which cannot be modified once constructed. Copies of it, including those
+    produced by :func:`copy_structure`, are ordinary dicts."""
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def _refuse(self, *args, **params):
+        raise TypeError('read-only dict cannot be modified')
+
+    __delitem__ = __setitem__ = clear = pop = popitem = setdefault = update = _refuse
+
 def abbreviate_string(value, maxlength=80):
     if len(value) <= maxlength:
         return value
@@ -41,6 +235,61 @@ def construct_all_list(namespace, cls):
             all.append(name)
     return all
 
+def contains_html(value):
+    """Determines if ``value`` is a string containing what appears to be an html tag."""
+
+    return (isinstance(value, basestring) and '<' in value
+        and HTML_EXPR.search(value) is not None)
+
+def copy_structure(structure):
+    """Copies the dicts, lists and tuples which make up ``structure``, sharing all other
+    values within it with the copy."""
+
+    structure_type = type(structure)
+    if structure_type is dict or structure_type is OrderedDict:
+        return structure_type((key, copy_structure(value))
+            for key, value in structure.iteritems())
+    elif structure_type is ReadOnlyDict:
+        return dict((key, copy_structure(value)) for key, value in structure.iteritems())
+    elif structure_type is list:
+        return [copy_structure(value) for value in structure]
+    elif structure_type is tuple:
+        return tuple([copy_structure(value) for value in structure])
+    else:
+        return structure
+
+def fingerprint_structure(structure):
+    """Constructs a stable fingerprint of ``structure``, which should be a natively
+    serializable value such as a field description. Equivalent structures always produce
+    the same fingerprint, regardless of the ordering of their mappings or whether their
+    strings are byte or unicode strings."""
+
+    return sha1(_canonicalize_value(structure)).hexdigest()
+
+def _canonicalize_value(value):
+    if isinstance(value, basestring):
+        if isinstance(value, unicode):
+            try:
+                value = value.encode('ascii')
+            except UnicodeEncodeError:
+                value = value.encode('utf8')
+        return repr(value)
+    elif isinstance(value, dict):
+        items = ['%s:%s' % (_canonicalize_value(k), _canonicalize_value(v))
+            for k, v in value.iteritems()]
+        items.sort()
+        return '{%s}' % ','.join(items)
+    elif isinstance(value, list):
+        return '[%s]' % ','.join([_canonicalize_value(v) for v in value])
+    elif isinstance(value, tuple):
+        return '(%s)' % ','.join([_canonicalize_value(v) for v in value])
+    elif value is None or value is True or value is False:
+        return repr(value)
+    elif isinstance(value, (int, long)):
+        return '%d' % value
+    else:
+        return '%s:%r' % (type(value).__name__, value)
+
 def getitem(obj, key, default=NODEFAULT):
     if default is not NODEFAULT:
         return obj.get(key, default)
@@ -251,6 +500,24 @@ def set_nested_value(subject, path, value):
 
     subject[last] = value
 
+def tally_errors(ancestry, count=1):
+    """Tallies ``count`` errors against the :class:`ErrorLimit`, if any, in effect for
+    ``ancestry``, returning ``True`` if that limit has been exhausted. Errors nested within
+    the structure of a :exc:`StructuralError` have already been tallied by the field which
+    collected them, so only the errors of the exception itself should be counted."""
+
+    while True:
+        if type(ancestry) is tuple:
+            ancestry = ancestry[0]
+        elif isinstance(ancestry, Ancestry):
+            limit = ancestry.limit
+            if limit is not None:
+                limit.count += count
+                return limit.count >= limit.maximum
+            ancestry = ancestry.parent
+        else:
+            return False
+
 def traverse_to_key(value, path):
     for key in path.split('.'):
         if isinstance(value, dict):
@@ -1,12 +1,21 @@
 from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from copy import deepcopy
 from datetime import date, datetime, time, timedelta
+import jinja2
+from jinja2.exceptions import SecurityError
+from StringIO import StringIO
 from unittest2 import TestCase
 from uuid import uuid4
 
 from scheme.exceptions import *
+from scheme.exceptions import CyclicParameterError
 from scheme.fields import *
+from scheme.formats import Json
+from scheme.interpolation import Interpolator, UndefinedValueError
 from scheme.surrogate import surrogate
 from scheme.timezone import LOCAL, UTC
+from scheme.util import Ancestry, fingerprint_structure
 
 def construct_now(delta=None):
     now = datetime.now().replace(microsecond=0, tzinfo=LOCAL)
@@ -93,6 +102,7 @@ class FieldTestCase(TestCase):
             else:
                 left, right = test, test
             self.assertEqual(field.interpolate(left, params), right)
+            self.assertEqual(field.prepare_interpolation(left)(params), right)
 
     def compare_structural_errors(self, expected, received):
         if not isinstance(received, type(expected)):
@@ -183,6 +193,40 @@ class TestField(FieldTestCase):
         self.assertIs(field.filter(exclusive=True, readonly=True), field)
         self.assertIs(field.filter(exclusive=True, readonly=False), None)
 
+    def test_cloning(self):
+        inner = Integer(name='a')
+        field = Structure({'a': inner}, name='b', aspect=['x'])
+
+        clone = field.clone(title='c')
+        self.assertEqual(clone.title, 'c')
+        self.assertEqual(clone.name, 'b')
+        self.assertIs(clone.structure['a'], inner)
+        self.assertIsNot(clone.structure, field.structure)
+        self.assertEqual(clone.aspect, ['x'])
+        self.assertIsNot(clone.aspect, field.aspect)
+
+        extension = field.extend({'c': Text()})
+        self.assertEqual(sorted(extension.structure), ['a', 'c'])
+        self.assertEqual(sorted(field.structure), ['a'])
+
+        extension = field.extend({'d': inner})
+        self.assertEqual(extension.structure['d'].name, 'd')
+        self.assertEqual(inner.name, 'a')
+
+        substitute = Integer(name='e')
+        replacement = field.replace({'a': substitute})
+        self.assertEqual(replacement.structure['a'].name, 'a')
+        self.assertEqual(substitute.name, 'e')
+
+        addition = Text()
+        extension = field.extend({'f': addition})
+        self.assertEqual(extension.structure['f'].name, 'f')
+        self.assertIs(addition.name, None)
+
+        copy = deepcopy(field)
+        self.assertIsInstance(copy.structure['a'], Integer)
+        self.assertIsNot(copy.structure['a'], inner)
+
     def test_defaults(self):
         field = Field(default=True)
         assert field.get_default() is True
@@ -198,6 +242,123 @@ class TestField(FieldTestCase):
         field = Field()
         self.assertEqual(field.instantiate(1), 1)
 
+    def test_reconstruction(self):
+        description = Structure({'a': Integer(), 'b': Sequence(Text())}).describe()
+        field = Field.reconstruct(description)
+        self.assertIsInstance(field, Structure)
+        self.assertEqual(field.describe(), description)
+        self.assertEqual(description['__type__'], 'structure')
+
+        cached = Field.reconstruct(description, cached=True)
+        self.assertIsNot(cached, field)
+        self.assertEqual(cached.describe(), description)
+
+        cached.name = 'x'
+        cached.insert(Integer(name='c'))
+        recached = Field.reconstruct(dict(description), cached=True)
+        self.assertIsNot(recached, cached)
+        self.assertIs(recached.name, None)
+        self.assertEqual(recached.describe(), description)
+        self.assertIs(recached.structure['a'], cached.structure['a'])
+
+    def test_description_caching(self):
+        def is_cached(field):
+            return bool(field.__dict__.get('_descriptions'))
+
+        inner = Structure({'b': Integer()}, name='a')
+        field = Structure({'a': inner})
+
+        description = field.describe()
+        self.assertTrue(is_cached(field))
+        self.assertIsNot(field.describe(), description)
+        self.assertEqual(field.describe(), description)
+        self.assertEqual(field.describe(verbose=True)['structure']['a']['required'], False)
+        self.assertEqual(field.describe(title='x')['title'], 'x')
+        self.assertEqual(sorted(field.describe(title='x')['structure']), ['a'])
+        self.assertNotIn('title', field.describe())
+
+        field.describe()['structure']['a']['structure']['b']['__type__'] = 'text'
+        self.assertEqual(field.describe(), description)
+
+        unrelated = Structure({'d': Integer()})
+        unrelated.describe()
+        clone = field.clone()
+        clone.describe()
+
+        extension = field.extend({'e': Text()})
+        self.assertEqual(sorted(extension.describe()['structure']), ['a', 'e'])
+        self.assertTrue(is_cached(field))
+        self.assertTrue(is_cached(unrelated))
+
+        inner.insert(Text(name='c'))
+        self.assertFalse(is_cached(field))
+        self.assertEqual(sorted(field.describe()['structure']['a']['structure']), ['b', 'c'])
+        self.assertFalse(is_cached(clone))
+        self.assertEqual(sorted(clone.describe()['structure']['a']['structure']), ['b', 'c'])
+        self.assertTrue(is_cached(unrelated))
+
+        inner.structure['b'].required = True
+        self.assertFalse(is_cached(field))
+        self.assertTrue(field.describe()['structure']['a']['structure']['b']['required'])
+
+        item = Integer()
+        self.assertNotIn('name', item.describe())
+        field = Structure({'a': item})
+        self.assertEqual(item.describe()['name'], 'a')
+        self.assertEqual(field.describe()['structure']['a']['name'], 'a')
+
+        item.required = True
+        self.assertTrue(item.describe()['required'])
+        self.assertTrue(field.describe()['structure']['a']['required'])
+
+        item = Text(name='a')
+        self.assertIs(type(item), Text)
+        item.describe()
+        self.assertIsNot(type(item), Text)
+        self.assertIsInstance(item, Text)
+        self.assertEqual(repr(item), "Text(name='a')")
+        self.assertIs(type(item.clone()), Text)
+        self.assertIs(Field.types['text'], Text)
+
+        item.title = 'title'
+        self.assertIs(type(item), Text)
+        self.assertFalse(is_cached(item))
+        self.assertEqual(item.describe()['title'], 'title')
+
+        undefined = Undefined()
+        field = Structure({'a': Structure({'b': undefined})})
+        self.assertRaises(SchemeError, field.describe)
+        undefined.define(Integer())
+        self.assertEqual(field.describe()['structure']['a']['structure']['b']['__type__'],
+            'integer')
+
+        undefined = Undefined()
+        field = Sequence(undefined)
+        self.assertRaises(SchemeError, field.describe)
+        undefined.define(Integer())
+        self.assertEqual(field.describe()['item']['__type__'], 'integer')
+
+        enumeration = Enumeration('a b')
+        field = Sequence(enumeration)
+        self.assertEqual(sorted(field.describe()['item']['enumeration']), ['a', 'b'])
+        enumeration.redefine_enumeration('c')
+        self.assertEqual(sorted(field.describe()['item']['enumeration']), ['a', 'b', 'c'])
+
+    def test_fingerprinting(self):
+        self.assertEqual(fingerprint_structure({'a': [1, 'b'], 'c': {'d': None}}),
+            fingerprint_structure({u'c': {u'd': None}, u'a': [1L, u'b']}))
+        self.assertNotEqual(fingerprint_structure({'a': [1]}), fingerprint_structure({'a': (1,)}))
+        self.assertNotEqual(fingerprint_structure({'a': 1}), fingerprint_structure({'a': '1'}))
+        self.assertNotEqual(fingerprint_structure({'a': True}), fingerprint_structure({'a': 1}))
+
+    def test_reading_and_writing(self):
+        field = Structure({'a': Date(), 'b': Sequence(Integer())})
+        value = {'a': date(2000, 1, 1), 'b': [1, 2]}
+        for format in ('json', 'yaml'):
+            stream = StringIO()
+            field.write(stream, value, format)
+            self.assertEqual(field.read(StringIO(stream.getvalue()), format=format), value)
+
     def test_interpolation(self):
         field = Field()
         self.assertEqual(field.interpolate(None, {}), None)
@@ -247,7 +408,7 @@ class TestDate(FieldTestCase):
     def test_processing(self):
         field = Date()
         self.assert_processed(field, None, construct_today())
-        self.assert_not_processed(field, 'invalid', ('', ''))
+        self.assert_not_processed(field, 'invalid', ('', ''), ('', '2000-01-01\n'))
 
     def test_minimum(self):
         today, today_text = construct_today()
@@ -271,7 +432,7 @@ class TestDate(FieldTestCase):
 class TestDateTime(FieldTestCase):
     def test_processing(self):
         field = DateTime()
-        self.assert_not_processed(field, 'invalid', True)
+        self.assert_not_processed(field, 'invalid', True, ('', '2000-01-01T00:00:00Z\n'))
         self.assert_processed(field, None)
 
         now = datetime.now().replace(microsecond=0)
@@ -586,6 +747,28 @@ class TestSequence(FieldTestCase):
         self.assert_processed(field, [], [1], [1, 2])
         self.assert_not_processed(field, 'duplicate', [1, 1])
 
+    def test_streaming(self):
+        field = Sequence(Structure({'a': Integer(), 'b': Date()}, strict=True),
+            name='items', max_length=3)
+        serialized = '[{"a": 1, "b": "2000-01-01"}, {"a": 2}]'
+
+        stream = field.unserialize_stream(StringIO(serialized), chunksize=4)
+        self.assertEqual(list(stream), [{'a': 1, 'b': date(2000, 1, 1)}, {'a': 2}])
+
+        stream = field.unserialize_stream(StringIO('[{"a": 1}, {"a": "b"}]'))
+        self.assertEqual(stream.next(), {'a': 1})
+        try:
+            stream.next()
+        except ValidationError, exception:
+            error = exception.structure['a']
+            self.assertEqual(error.errors[0]['token'], 'invalid')
+            self.assertEqual(''.join(error.identity), 'items[1].a')
+        else:
+            self.fail()
+
+        stream = field.unserialize_stream(StringIO('[{}, {}, {}, {}]'))
+        self.assertRaises(ValidationError, list, stream)
+
     def test_undefined_fields(self):
         f = Undefined(Integer())
         field = Sequence(f)
@@ -800,6 +983,102 @@ class TestStructure(FieldTestCase):
         self.assert_processed(field, {'identity': 'alpha', 'a': 1, 'n': 3},
             {'identity': 'beta', 'b': 2, 'n': 3})
 
+    def test_filtering(self):
+        field = Structure({'a': Integer(), 'b': Text(readonly=True),
+            'c': Structure({'d': Integer(readonly=True), 'e': Text()})})
+
+        filtered = field.filter(readonly=False)
+        self.assertEqual(sorted(filtered.structure), ['a', 'c'])
+        self.assertEqual(sorted(filtered.structure['c'].structure), ['e'])
+        self.assertIs(field.filter(exclusive=True, readonly=True), None)
+
+        self.assertIs(field.filter(readonly=False), filtered)
+        self.assertIsNot(field.filter(readonly=True), filtered)
+
+        self.assertRaises(TypeError, filtered.insert, Integer(name='g'))
+        self.assertRaises(TypeError, filtered.structure['c'].insert, Integer(name='h'))
+        self.assertRaises(TypeError, setattr, filtered, 'required', True)
+        self.assertRaises(TypeError, filtered.structure.pop, 'a')
+        self.assertEqual(sorted(field.filter(readonly=False).structure), ['a', 'c'])
+
+        clone = filtered.clone()
+        clone.insert(Integer(name='g'))
+        self.assertEqual(sorted(clone.structure), ['a', 'c', 'g'])
+        self.assertEqual(sorted(filtered.structure), ['a', 'c'])
+
+        field.structure['c'].insert(Integer(name='f'))
+        refiltered = field.filter(readonly=False)
+        self.assertIsNot(refiltered, filtered)
+        self.assertEqual(sorted(refiltered.structure['c'].structure), ['e', 'f'])
+
+        field.structure['a'].readonly = True
+        self.assertEqual(sorted(field.filter(readonly=False).structure), ['c'])
+
+        field = Sequence(Structure({'a': Integer(), 'b': Text(readonly=True)}))
+        filtered = field.filter(readonly=False)
+        self.assertEqual(sorted(filtered.item.structure), ['a'])
+        self.assertIs(field.filter(readonly=False), filtered)
+        self.assertRaises(TypeError, setattr, filtered, 'item', Integer())
+
+        embedding = Structure({'x': field.filter(readonly=False)})
+        self.assertEqual(embedding.structure['x'].name, 'x')
+        self.assertIs(filtered.name, None)
+
+        view = filtered.item
+        embedding = Structure({'x': view})
+        self.assertEqual(embedding.structure['x'].name, 'x')
+        self.assertEqual(sorted(embedding.structure['x'].structure), ['a'])
+        self.assertIs(view.name, None)
+        self.assertIs(field.filter(readonly=False).item, view)
+
+        embedding = Structure({'alpha': {'x': view}, 'beta': {'y': Integer()}}, polymorphic_on='type')
+        self.assertEqual(embedding.structure['alpha']['x'].name, 'x')
+        self.assertIs(view.name, None)
+
+    def test_streaming_serialization(self):
+        field = Structure({
+            'total': Integer(required=True),
+            'resources': Sequence(Structure({'a': Integer(), 'b': Date(),
+                'c': Text(ignore_null=True)}, key_order='b a c')),
+        }, name='response')
+
+        value = {'total': 2, 'resources': [{'a': 1, 'b': date(2000, 1, 1)},
+            {'a': 2, 'b': date(2000, 1, 2), 'c': None}]}
+        for buffersize in (1, 65536):
+            stream = StringIO()
+            field.serialize_stream(value, 'json', stream, buffersize=buffersize)
+            self.assertEqual(Json.unserialize(stream.getvalue()),
+                Json.unserialize(field.serialize(value, 'json')))
+        self.assertTrue(stream.getvalue().startswith('{') and '{"b": "2000-01-01", "a": 1}'
+            in stream.getvalue())
+
+        error = should_fail(field.serialize_stream, {'total': 1, 'resources': [{'a': 'x'}]},
+            'json', StringIO())
+        self.assertEqual(''.join(error.identity), 'response.resources[0]')
+        self.assertEqual(''.join(error.structure['a'].identity), 'response.resources[0].a')
+        error = should_fail(field.serialize_stream, {'resources': []}, 'json', StringIO())
+        self.assertEqual(error.structure['total'].errors[0]['token'], 'required')
+
+        streamed = field._stream_value(value, Ancestry('response'))
+        self.assertNotIsInstance(streamed, dict)
+        self.assertEqual(sorted(dict(streamed)), ['resources', 'total'])
+        self.assertEqual(streamed.get('total'), 2)
+        self.assertEqual(sorted(streamed.keys()), ['resources', 'total'])
+
+        resources = streamed['resources']
+        self.assertNotIsInstance(resources, list)
+        self.assertEqual(len(resources), 2)
+        self.assertEqual(len(resources[-1]), 2)
+        self.assertNotIn('c', resources[1])
+        self.assertEqual(dict(resources[1]), {'a': 2, 'b': '2000-01-02'})
+        self.assertEqual([dict(item) for item in resources[:1]], [{'a': 1, 'b': '2000-01-01'}])
+
+        field = Structure({'c': Text(ignore_null=True)})
+        for format in ('json', 'xml'):
+            stream = StringIO()
+            field.serialize_stream({'c': None}, format, stream)
+            self.assertEqual(stream.getvalue(), field.serialize({'c': None}, format))
+
     def test_naive_extraction(self):
         field = Structure({'a': Integer()})
         value = {'a': 1}
@@ -1236,3 +1515,329 @@ class TestUUID(FieldTestCase):
 
         self.assert_interpolated(field, None, '', uuid)
         self.assert_interpolated(field, ('${value}', uuid), value=uuid)
+
+class TestCompilation(FieldTestCase):
+    def assert_compiled(self, field, *values):
+        for phase, serialized in ((INCOMING, False), (INCOMING, True), (OUTGOING, False), (OUTGOING, True)):
+            processor = field.compile(phase, serialized)
+            for value in values:
+                try:
+                    expected = field.process(value, phase, serialized)
+                except StructuralError, exception:
+                    error = should_fail(processor, value)
+                    failed, reason = self.compare_structural_errors(exception, error)
+                    assert failed, reason
+                    self.assertEqual(error.format_errors(), exception.format_errors())
+                else:
+                    self.assertEqual(processor(value), expected)
+
+    def test_simple_fields(self):
+        self.assert_compiled(Integer(minimum=2), None, 1, 2, '3', True)
+        self.assert_compiled(Text(nonnull=True, max_length=3), None, 'abc', 'abcd', '<b>')
+        self.assert_compiled(Enumeration('a b', ignored_values=['c']), None, 'a', 'c', 'd')
+        self.assert_compiled(Boolean(constant=True), True, False)
+
+    def test_shortcut_fields(self):
+        self.assert_compiled(Integer(), None, 1, 2L, '3', 1.5, True)
+        self.assert_compiled(Float(), None, 1.5, 1, '2.5', 'a')
+        self.assert_compiled(Boolean(nonnull=True), None, True, False, 1)
+        self.assert_compiled(Text(), None, u' a ', ' b ', u'<b>', 1)
+        self.assert_compiled(Text(strip=False, escape_html_entities=False), u' <b> ')
+
+    def test_nested_errors(self):
+        field = Structure({
+            'a': Union(Structure({'x': Integer()}), Text()),
+            'b': Map(Sequence(Integer()), key=Integer(), required_keys=[1]),
+            'c': Tuple((Integer(), Structure({'y': Text()}, strict=True))),
+            'd': Text(default='d'),
+        }, strict=True)
+        self.assert_compiled(field, {}, {'a': {'x': 1}}, {'a': {'x': 'x'}}, {'a': 'a'},
+            {'b': {1: [1, 2]}}, {'b': {1: [1, 'a']}}, {'b': {2: []}}, {'b': {'a': []}},
+            {'c': (1, {'y': 'y'})}, {'c': (1, {'y': 'y', 'z': 1})}, {'z': 1},
+            {'a': {'x': 'x'}, 'b': {1: ['a']}, 'c': ('a', {'y': 1})})
+
+    def test_preprocessor_invocations(self):
+        calls = []
+        def preprocessor(value):
+            calls.append(value)
+            return value
+
+        field = Structure({'a': Integer(preprocessor=preprocessor), 'b': Integer()},
+            preprocessor=preprocessor)
+        plan = field.compile()
+
+        self.assertEqual(plan({'a': 1, 'b': 2}), {'a': 1, 'b': 2})
+        self.assertEqual(calls, [{'a': 1, 'b': 2}, 1])
+
+        del calls[:]
+        self.assertRaises(ValidationError, plan, {'a': 1, 'b': 'b'})
+        self.assertEqual(calls, [{'a': 1, 'b': 'b'}, 1, 1])
+
+    def test_structural_fields(self):
+        field = Structure({
+            'a': Integer(required=True),
+            'b': Sequence(Map(Date()), min_length=1),
+            'c': Tuple((Text(), Boolean())),
+            'd': Union(Integer(), Text()),
+            'e': Integer(default=3),
+            'f': Text(ignore_null=True),
+        })
+        self.assert_compiled(field, None, {}, {'a': 1}, {'a': 1, 'f': None, 'z': 2},
+            {'a': '1', 'b': [{'x': date(2000, 1, 1)}], 'c': ('a', True), 'd': 'd'},
+            {'a': 1, 'b': [{'x': '2000-01-01'}, {'y': 2}], 'c': ['a'], 'd': True},
+            {'a': 1, 'b': []})
+
+    def test_polymorphic_structures(self):
+        field = Structure({
+            'alpha': {'a': Integer()},
+            'beta': {'b': Text(required=True)},
+        }, polymorphic_on='type', key_order={'alpha': ['type', 'a'], 'beta': ['b', 'type']})
+        self.assert_compiled(field, {'type': 'alpha', 'a': 1}, {'type': 'beta', 'b': 'b'},
+            {'type': 'beta'}, {'type': 'gamma'}, {'a': 1})
+        self.assertIsInstance(field.compile()({'type': 'alpha', 'a': 1}), OrderedDict)
+
+    def test_undefined_fields(self):
+        f = Undefined()
+        field = Sequence(f)
+        self.assertRaises(SchemeError, field.compile)
+
+        f.define(Integer())
+        self.assert_compiled(field, [1, 2], [1, 'a'])
+
+    def test_recursive_structures(self):
+        node = Undefined()
+        field = Structure({'value': Integer(), 'children': Sequence(node)})
+        node.define(field)
+
+        value = {'value': 1, 'children': [{'value': 2, 'children': [{'value': 3}]}]}
+        self.assert_compiled(field, value, {'value': 1, 'children': [{'value': 'a'}]})
+
+        sequence = Sequence(field)
+        self.assertEqual([v for v, e in field.process_stream([value])], [value])
+
+        stream = StringIO()
+        sequence.serialize_stream([value], 'json', stream)
+        self.assertEqual(list(sequence.unserialize_stream(StringIO(stream.getvalue()))), [value])
+
+class TestAncestry(FieldTestCase):
+    def test_error_identity(self):
+        field = Structure({'a': Sequence(Map(Integer()))}, name='root')
+        for processor in (field.process, field.compile()):
+            error = should_fail(processor, {'a': [{'x': 1}, {'y': 'z'}]})
+            error = error.structure['a'].structure[1].structure['y']
+            self.assertEqual(''.join(error.identity), 'root.a[1][y]')
+            self.assertEqual(error.identity, ['root', '.a', '[1]', '[y]'])
+
+    def test_explicit_ancestry(self):
+        field = Sequence(Integer())
+        error = should_fail(field.process, ['a'], INCOMING, False, ['outer', '.items'])
+        self.assertEqual(''.join(error.structure[0].identity), 'outer.items[0]')
+
+    def test_concatenation_and_hashing(self):
+        ancestry = Ancestry('b', Ancestry('a'), '.%s')
+        self.assertEqual(ancestry + ['[0]'], ['a', '.b', '[0]'])
+        self.assertEqual(['root', '.'] + ancestry, ['root', '.', 'a', '.b'])
+        self.assertEqual(('root',) + ancestry, ['root', 'a', '.b'])
+        self.assertEqual(ancestry + '[0]', 'a.b[0]')
+        self.assertEqual('error at ' + ancestry, 'error at a.b')
+        self.assertEqual(u'error at ' + ancestry, u'error at a.b')
+
+        self.assertEqual(ancestry, 'a.b')
+        self.assertNotEqual(ancestry, 'a.c')
+        self.assertEqual(hash(ancestry), hash(Ancestry('b', ['a'], '.%s')))
+        self.assertEqual({ancestry: 1}['a.b'], 1)
+        self.assertEqual({'a.b': 1}[ancestry], 1)
+        self.assertEqual(len(set([ancestry, Ancestry('b', Ancestry('a'), '.%s')])), 1)
+
+    def test_ancestry_links(self):
+        link = ((None, 'root', '%s'), 'a', '.%s')
+        error = ValidationError(identity=(link, 0, '[%s]'))
+        self.assertIsInstance(error.identity, Ancestry)
+        self.assertEqual(error.identity, 'root.a[0]')
+        self.assertEqual(Ancestry('b', link, '.%s'), ['root', '.a', '.b'])
+        self.assertEqual(Ancestry('a', ['root'], '.%s'), link)
+
+        segments = ('root', '.a', '[0]')
+        self.assertIs(ValidationError(identity=segments).identity, segments)
+
+        field = Sequence(Integer())
+        error = should_fail(field.process, ['a'], INCOMING, False, [])
+        self.assertEqual(error.structure[0].identity, ['[0]'])
+
+class TestBatchProcessing(FieldTestCase):
+    def test_process_many(self):
+        field = Structure({'a': Integer(required=True)})
+        self.assertEqual(field.process_many([{'a': 1}, {'a': '2'}], INCOMING, True),
+            [{'a': 1}, {'a': 2}])
+        self.assertEqual(field.process_many(iter([])), [])
+
+        expected_error = ValidationError(structure=[{'a': 1},
+            ValidationError(structure={'a': INVALID_ERROR}), ValidationError(structure={'a': REQUIRED_ERROR})])
+        error = should_fail(field.process_many, [{'a': 1}, {'a': 'a'}, {}])
+        failed, reason = self.compare_structural_errors(expected_error, error)
+        assert failed, reason
+        self.assertEqual(''.join(error.structure[1].structure['a'].identity), '(structure)[1].a')
+
+    def test_max_errors(self):
+        field = Integer()
+        error = should_fail(field.process_many, [1, 'a', 2, 'b', 3], INCOMING, False, 1)
+        self.assertEqual(len(error.structure), 2)
+
+        stream = field.process_stream([1, 'a', 2, 'b', 3], INCOMING, False, 2)
+        results = list(stream)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0], (1, None))
+        self.assertIsInstance(results[3][1], InvalidTypeError)
+
+class TestErrorLimits(FieldTestCase):
+    def test_fail_fast(self):
+        field = Sequence(Structure({'a': Integer(), 'b': Integer()}))
+        value = [{'a': 1}, {'a': 'a', 'b': 'b'}, {'a': 'c'}]
+
+        error = should_fail(field.process, value)
+        self.assertEqual(len(error.structure), 3)
+
+        for processor in (lambda v: field.process(v, max_errors=1), field.compile(max_errors=1)):
+            error = should_fail(processor, value)
+            self.assertEqual(len(error.structure), 2)
+            self.assertEqual(len(error.structure[1].structure), 1)
+            self.assertEqual(len(error.format_errors()), 1)
+
+    def test_max_errors(self):
+        field = Map(Integer(), required_keys='x y')
+        error = should_fail(field.process, {'a': 1, 'b': 'b'}, max_errors=2)
+        self.assertEqual(len(error.format_errors()), 2)
+
+        field = Structure({'a': Integer(required=True), 'b': Integer(required=True)})
+        error = should_fail(field.process, {'z': 1}, max_errors=1)
+        self.assertEqual(len(error.structure), 1)
+
+        field = Tuple((Integer(), Integer(), Integer()))
+        error = should_fail(field.process, ('a', 'b', 'c'), max_errors=2)
+        self.assertEqual(len(error.structure), 2)
+        self.assertEqual(field.process((1, 2, 3), max_errors=1), (1, 2, 3))
+
+    def test_error_counts(self):
+        class Bounded(Integer):
+            def _validate_value(self, value, ancestry):
+                raise ValidationError(identity=ancestry, field=self, value=value).construct(
+                    'minimum', minimum=0).construct('maximum', maximum=0)
+
+        field = Sequence(Bounded())
+        for processor in (lambda v: field.process(v, max_errors=2), field.compile(max_errors=2)):
+            error = should_fail(processor, [1, 2, 3])
+            self.assertEqual(len(error.structure), 1)
+            self.assertEqual(len(error.format_errors()), 2)
+
+        field = Structure({'a': Sequence(Integer()), 'b': Integer(), 'c': Integer()})
+        for processor in (lambda v: field.process(v, max_errors=3), field.compile(max_errors=3)):
+            error = should_fail(processor, {'a': ['a', 'b'], 'b': 'b', 'c': 'c'})
+            self.assertEqual(len(error.format_errors()), 3)
+
+class TestInterpolation(FieldTestCase):
+    def test_compilation_caching(self):
+        interpolator = Interpolator(cache_size=2)
+        field = Structure({'a': Integer(), 'b': Text(), 'c': Sequence(Text())})
+        value = {'a': '${x * 1}', 'b': 'x is ${x}', 'c': ['x is ${x}', '${y}']}
+
+        for x in (1, 2):
+            self.assertEqual(field.interpolate(value, {'x': x, 'y': 'y'}, interpolator),
+                {'a': x, 'b': 'x is %d' % x, 'c': ['x is %d' % x, 'y']})
+
+        self.assertEqual((interpolator.expressions.misses, interpolator.expressions.hits), (1, 1))
+        self.assertEqual((interpolator.templates.misses, interpolator.templates.hits), (1, 3))
+
+        for i in range(3):
+            interpolator.evaluate('x + %d' % i, {'x': 1})
+        self.assertEqual(len(interpolator.expressions), 2)
+        self.assertNotIn('x', interpolator.expressions)
+
+    def test_fast_paths(self):
+        class attrs(object):
+            b = 'attribute'
+
+        interpolator = Interpolator()
+        parameters = {'a': {'b': [1], 'c': None}, 'o': attrs(), 'true': 1}
+        for subject, value in (('a.b', [1]), ('a.c', None), ('o.b', 'attribute'), ('true', True)):
+            self.assertEqual(interpolator.evaluate(subject, parameters), value)
+        for subject in ('a.d', 'a.c.d', 'b'):
+            self.assertRaises(UndefinedValueError, interpolator.evaluate, subject, parameters)
+
+        for subject, value in (('text', u'text'), ('{x}', u'{x}'), ('line\n', u'line'),
+                ('${ a.b }', u'[1]'), ('${a.c}', u'None'), ('${a.d}', u'')):
+            self.assertEqual(interpolator.interpolate(subject, parameters), value)
+        self.assertEqual((interpolator.expressions.misses, interpolator.templates.misses), (2, 3))
+
+    def test_prepared_interpolation(self):
+        field = Structure({
+            'static': Structure({'a': Integer(), 'b': Sequence(Text())}),
+            'dynamic': Map(Tuple((Text(), Integer()))),
+            'missing': Integer(),
+        })
+
+        value = {'static': {'a': 1, 'b': ['b', 'c']}, 'missing': '${missing}',
+            'dynamic': {'x': ('x is ${x}', '${x}'), 'y': ('y', 2)}}
+        interpolate = field.prepare_interpolation(value)
+
+        first, second = interpolate({'x': 1}), interpolate({'x': 2})
+        self.assertEqual(first, {'static': {'a': 1, 'b': [u'b', u'c']},
+            'dynamic': {'x': (u'x is 1', 1), 'y': (u'y', 2)}})
+        self.assertEqual(second['dynamic']['x'], (u'x is 2', 2))
+        self.assertIs(first['static'], second['static'])
+        self.assertIs(first['dynamic']['y'], second['dynamic']['y'])
+        self.assertEqual(interpolate({'x': 1, 'missing': 3})['missing'], 3)
+
+    def test_pooling(self):
+        first, second = {'mark': lambda v: v + '!'}, {'mark': lambda v: v + '?'}
+        interpolator = Interpolator.pooled(first)
+        self.assertIs(Interpolator.pooled(dict(first)), interpolator)
+        self.assertIsNot(Interpolator.pooled(second), interpolator)
+        self.assertIsNot(Interpolator.pooled(first, sandboxed=True), interpolator)
+
+        subject = "${'a'|mark} ${b|mark}"
+        for filters, value in ((first, u'a! b!'), (second, u'a? b?'), (first, u'a! b!')):
+            self.assertEqual(Interpolator(filters).interpolate(subject, {'b': 'b'}), value)
+        self.assertIn(subject, [key[0] for key in Interpolator.code_cache.entries])
+
+        class value(object):
+            pass
+
+        sandboxed = Interpolator.pooled(sandboxed=True)
+        self.assertEqual(sandboxed.evaluate('n + 1', {'n': 1}), 2)
+        self.assertIs(Interpolator().evaluate('v.__class__', {'v': value()}), value)
+        self.assertRaises(UndefinedValueError, sandboxed.evaluate, 'v.__class__', {'v': value()})
+        self.assertRaises(SecurityError, sandboxed.interpolate, '${v.__class__.__mro__}',
+            {'v': value()})
+
+        subject = 'x ${a} {{a}}'
+        self.assertEqual(Interpolator().interpolate(subject, {'a': '<'}), u'x < {{a}}')
+        for settings, expected in (({}, u'x ${a} <'), ({'autoescape': True}, u'x ${a} &lt;')):
+            interpolator = Interpolator()
+            interpolator.environment = jinja2.Environment(**settings)
+            self.assertEqual(interpolator.interpolate(subject, {'a': '<'}), expected)
+
+    def test_resolution(self):
+        interpolator = Interpolator()
+        self.assertEqual(interpolator.find_references('${a + b.c} {% set d = 1 %}${d|slugify}'),
+            frozenset(['a', 'b']))
+        self.assertEqual(interpolator.find_references('plain'), frozenset())
+
+        field = Structure({
+            'root': Text(),
+            'path': Text(),
+            'ports': Sequence(Integer()),
+            'hosts': Map(Text()),
+            'missing': Integer(),
+        })
+        value = {'hosts': {'primary': '${root}.primary', 'backup': 'x'}, 'ports': ['${base}', 2],
+            'path': '/${hosts.primary}/${ports[0]}', 'root': '${prefix}-db', 'missing': '${nothing}'}
+
+        self.assertEqual(field.resolve(value, {'prefix': 'main', 'base': 1}),
+            {'root': u'main-db', 'hosts': {'primary': u'main-db.primary', 'backup': u'x'},
+             'ports': [1, 2], 'path': u'/main-db.primary/1'})
+
+        value = {'root': '${path}', 'path': '${hosts.primary}', 'hosts': {'primary': '${root}'}}
+        with self.assertRaises(CyclicParameterError) as context:
+            field.resolve(value)
+        self.assertEqual(len(context.exception.cycle), 4)
+        self.assertEqual(context.exception.cycle[0], context.exception.cycle[-1])
@@ -1,8 +1,312 @@
+import json
+import os
+import yaml
+from collections import OrderedDict, namedtuple
 from datetime import date, datetime, time
+from decimal import Decimal as decimal
+from StringIO import StringIO
+from shutil import rmtree
+from tempfile import mkdtemp, mkstemp
 from unittest2 import TestCase
 from urllib import unquote
 
+from scheme.exceptions import *
+from scheme.fields import *
 from scheme.formats import *
+from scheme.util import import_object
+
+JSON_PAYLOADS = [
+    None, True, False, 0, -1, 2L ** 40, 1.5, -0.25, 1e100, u'', u'text', u'\xe9\u4e2d',
+    u'"quoted" \\ / \n\t\x00', [], {}, [1, [2, [3, []]]], (1, u'a'),
+    {u'a': {u'b': [None, 1.25, u'c']}, u'd': []},
+    {u'total': 2, u'resources': [{u'id': 1, u'name': u'a'}, {u'id': 2, u'name': u'b'}]},
+]
+
+Point = namedtuple('Point', 'x y')
+
+JSON_PARITY_PAYLOADS = JSON_PAYLOADS + [
+    decimal('1.10'), [decimal('-0.000'), decimal('1E+3')], Point(1, 2),
+    {u'p': Point(decimal('2.5'), [Point(u'a', None)])}, float('nan'), float('inf'),
+    {u'a': float('nan'), u'b': [float('-inf')]}, {1: u'a', 2.5: u'b', None: u'c', True: u'd'},
+]
+
+class TestCsv(TestCase):
+    def test_serialization(self):
+        rows = [{'a': 1, 'b': 'text, "quoted"'}, {'a': 2, 'c': 3}]
+        self.assertEqual(Csv.serialize(rows),
+            '"a","b"\r\n"1","text, ""quoted"""\r\n"2",""\r\n')
+        self.assertEqual(Csv.serialize(rows, columns='b,a'),
+            '"b","a"\r\n"text, ""quoted""","1"\r\n"","2"\r\n')
+        self.assertEqual(Csv.serialize({'rows': rows}, columns=['a'], path='rows'),
+            '"a"\r\n"1"\r\n"2"\r\n')
+
+        self.assertEqual(Csv.serialize([]), '')
+        self.assertEqual(Csv.serialize(iter([])), '')
+        for invalid in (None, 'text', {'a': 1}):
+            self.assertRaises(ValueError, Csv.serialize, invalid)
+
+    def test_streaming_serialization(self):
+        schema = Structure({'id': Integer(), 'day': Date(), 'amount': Decimal(),
+            'name': Text()}, key_order='id name day amount')
+
+        def generate():
+            for i in range(3):
+                yield {'id': i, 'name': 'n%d' % i, 'amount': decimal('%d.50' % i),
+                    'day': date(2000, 1, i + 1) if i else None}
+
+        content = StringIO()
+        Csv.serialize_stream(generate(), content, schema=schema)
+        self.assertEqual(content.getvalue(), ''.join([
+            '"id","name","day","amount"\r\n',
+            '"0","n0","","0.50"\r\n',
+            '"1","n1","2000-01-02","1.50"\r\n',
+            '"2","n2","2000-01-03","2.50"\r\n',
+        ]))
+
+        content = StringIO()
+        Csv.serialize_stream(generate(), content, columns='day', schema=schema)
+        self.assertEqual(content.getvalue(), '"day"\r\n""\r\n"2000-01-02"\r\n"2000-01-03"\r\n')
+
+        for streaming in (False, True):
+            content = StringIO()
+            Sequence(schema).write(content, list(generate()), format='csv', schema=schema,
+                streaming=streaming)
+            self.assertEqual(content.getvalue(), Csv.serialize(generate(), schema=schema))
+
+        rows = [{'day': date(2000, 1, 1)}, {'day': '2000-01-01'}]
+        with self.assertRaises(ValidationError) as context:
+            Csv.serialize(rows, schema=schema)
+        self.assertEqual(''.join(context.exception.identity), '[1].day')
+
+    def test_unserialization(self):
+        rows = [{'a': '1', 'b': 'text, "quoted"\nline'}, {'a': '', 'b': 'True'}]
+        serialized = Csv.serialize(rows)
+        self.assertEqual(Csv.unserialize(serialized), rows)
+        self.assertEqual(Csv.read(StringIO(serialized + '\r\n')), rows)
+        self.assertEqual(Csv.unserialize(''), [])
+
+    def test_streaming(self):
+        schema = Structure({'id': Integer(nonnull=True), 'day': Date(), 'flag': Boolean(),
+            'score': Float(), 'name': Text()}, key_order='id day flag score name')
+
+        serialized = Csv.serialize([
+            {'id': 1, 'day': '2000-01-02', 'flag': True, 'score': 1.5, 'name': ''},
+            {'id': '', 'day': 'invalid', 'flag': 'false', 'score': '', 'name': 'b'},
+            {'id': 3, 'day': '', 'flag': 'yes', 'score': '2', 'name': 'c'},
+        ], schema.key_order)
+
+        rows = list(Csv.unserialize_stream(StringIO(serialized), schema))
+        self.assertEqual(rows[1], {'id': None, 'day': 'invalid', 'flag': False,
+            'score': None, 'name': 'b'})
+
+        results = list(schema.process_stream(rows, INCOMING, True))
+        self.assertEqual(results[0], ({'id': 1, 'day': date(2000, 1, 2), 'flag': True,
+            'score': 1.5, 'name': ''}, None))
+
+        value, error = results[1]
+        self.assertIsNone(value)
+        self.assertEqual(sorted(error.serialize()[1]), ['day', 'id'])
+
+        value, error = results[2]
+        self.assertIsNone(value)
+        self.assertEqual(sorted(error.serialize()[1]), ['flag'])
+
+        field = Sequence(schema)
+        stream = field.unserialize_stream(StringIO(serialized), 'csv', schema=schema)
+        self.assertEqual(next(stream), results[0][0])
+        self.assertRaises(ValidationError, next, stream)
+
+class TestJson(TestCase):
+    def setUp(self):
+        self.encoder, self.decoder = Json.encoder, Json.decoder
+
+    def tearDown(self):
+        Json.encoder, Json.decoder = self.encoder, self.decoder
+
+    def test_backend_selection(self):
+        self.assertTrue(Json.encoder is not None and Json.decoder is not None)
+
+        Json.select_backend('scheme.json')
+        self.assertEqual(type(Json.encoder).__module__, 'scheme.json.encoder')
+        self.assertEqual(type(Json.decoder).__module__, 'scheme.json.decoder')
+        self.assertRaises(ImportError, Json.select_backend, 'nonexistent_json_module')
+        self.assertRaises(ValueError, Json.select_backend, 'json')
+
+    def test_backend_parity(self):
+        reference = import_object('scheme.json')
+        for name in Json.encoders:
+            try:
+                module = import_object(name)
+            except ImportError:
+                continue
+
+            Json.encoder = module.JSONEncoder(**Json.encoder_options)
+            for payload in JSON_PARITY_PAYLOADS:
+                self.assertEqual(Json.serialize(payload), reference.dumps(payload))
+
+        Json.encoder = reference.JSONEncoder(**Json.encoder_options)
+        for name in Json.decoders:
+            try:
+                module = import_object(name)
+            except ImportError:
+                continue
+
+            Json.decoder = module.JSONDecoder(**Json.decoder_options)
+            for payload in JSON_PARITY_PAYLOADS:
+                serialized = reference.dumps(payload)
+                for value in (serialized, serialized.decode('utf8')):
+                    self.assertEqual(repr(Json.unserialize(value)),
+                        repr(reference.loads(serialized)))
+
+    def test_reading_and_writing(self):
+        descriptor, path = mkstemp('.json')
+        os.close(descriptor)
+        try:
+            for payload in JSON_PAYLOADS[1:]:
+                Format.write(path, payload)
+                self.assertEqual(Format.read(path), Json.unserialize(Json.serialize(payload)))
+
+                openfile = open(path)
+                try:
+                    self.assertEqual(Json.read(openfile), Format.read(path))
+                finally:
+                    openfile.close()
+
+                stream = StringIO()
+                Json.write(stream, payload)
+                self.assertEqual(stream.getvalue(), Json.serialize(payload))
+                self.assertEqual(Json.read(StringIO(stream.getvalue())), Format.read(path))
+
+            open(path, 'w').close()
+            self.assertRaises(ValueError, Format.read, path)
+        finally:
+            os.unlink(path)
+
+    def test_writing_in_place(self):
+        directory = mkdtemp()
+        path = os.path.join(directory, 'target.json')
+        try:
+            Format.write(path, {'a': 1})
+            os.chmod(path, 0600)
+
+            link = os.path.join(directory, 'link.json')
+            os.symlink(path, link)
+            hardlink = os.path.join(directory, 'hardlink.json')
+            os.link(path, hardlink)
+
+            Format.write(link, {'a': 2})
+            self.assertTrue(os.path.islink(link))
+            self.assertEqual(Format.read(path), {'a': 2})
+            self.assertEqual(Format.read(hardlink), {'a': 2})
+            self.assertEqual(os.stat(path).st_mode & 0777, 0600)
+
+            original = Format.spooling_threshold
+            Format.spooling_threshold = 0
+            try:
+                Format.write(path, {'a': 3})
+            finally:
+                Format.spooling_threshold = original
+            self.assertEqual(Format.read(hardlink), {'a': 3})
+            self.assertEqual(sorted(os.listdir(directory)),
+                ['hardlink.json', 'link.json', 'target.json'])
+        finally:
+            rmtree(directory)
+
+    def test_failed_writing(self):
+        descriptor, path = mkstemp('.json')
+        os.close(descriptor)
+        try:
+            Format.write(path, {'a': 1})
+            field = Structure({'a': Integer()})
+            for streaming in (False, True):
+                self.assertRaises(StructuralError, field.write, path, {'a': 'b'},
+                    streaming=streaming)
+                self.assertEqual(Format.read(path), {'a': 1})
+
+            with self.assertRaises(ValidationError) as context:
+                field.write(path, {'a': 'b'})
+            self.assertIsInstance(context.exception.structure['a'], InvalidTypeError)
+
+            prefix = os.path.basename(path) + '.'
+            self.assertFalse([name for name in os.listdir(os.path.dirname(path))
+                if name.startswith(prefix)])
+        finally:
+            os.unlink(path)
+
+    def test_streaming_serialization(self):
+        class lazylist(list):
+            def __iter__(self):
+                return iter([1, {'a': [2]}])
+
+        class lazydict(dict):
+            def iteritems(self):
+                return iter([('b', lazylist()), ('c', lazylist([]))])
+
+        for payload in JSON_PAYLOADS:
+            for buffersize in (1, 65536):
+                stream = StringIO()
+                Json.serialize_stream(payload, stream, buffersize)
+                self.assertEqual(stream.getvalue(), Json.serialize(payload))
+
+        stream = StringIO()
+        Json.serialize_stream(lazydict(), stream, 1)
+        self.assertEqual(stream.getvalue(), '{"b": [1, {"a": [2]}], "c": [1, {"a": [2]}]}')
+
+        payload = OrderedDict([(1, 'a'), (None, 2), (2L ** 40, 3), (1.5, 4), (u'\xe9', 5)])
+        stream = StringIO()
+        Json.serialize_stream(payload, stream)
+        self.assertEqual(stream.getvalue(), json.dumps(payload))
+
+        stream = StringIO()
+        Json.serialize_stream(OrderedDict([(True, 1), (False, 2)]), stream)
+        self.assertEqual(stream.getvalue(), '{"true": 1, "false": 2}')
+        self.assertRaises(TypeError, Json.serialize_stream, OrderedDict([((1, 2), 1)]), StringIO())
+
+    def test_streaming(self):
+        for payload in ([], [1], JSON_PAYLOADS, [{u'a': u'\xe9' * 10}, [u'\u4e2d', 2.5]] * 5):
+            serialized = Json.serialize(payload).replace(', ', ' ,\n ')
+            for chunksize in (1, 2, 7, 65536):
+                stream = Json.unserialize_stream(StringIO(serialized), chunksize)
+                self.assertEqual(list(stream), Json.unserialize(serialized))
+
+        for invalid in ('', '{}', '[1, 2', '[1 2]', '[1, }'):
+            stream = Json.unserialize_stream(StringIO(invalid), 2)
+            self.assertRaises(ValueError, list, stream)
+
+        remainder = ', '.join(['{"a": "[,]"}'] * 1000) + ']'
+        for element in ('{"a": x}', '[1, tru]', 'nul', '"\\x"', '{"a": "b" "c": 1}'):
+            content = StringIO('[1, %s, %s' % (element, remainder))
+            stream = Json.unserialize_stream(content, 16)
+            self.assertEqual(next(stream), 1)
+            self.assertRaises(ValueError, next, stream)
+            self.assertLess(content.tell(), 64)
+
+    def test_streaming_large_elements(self):
+        element = {'items': [{'name': u'\xe9 %d, [{' % i, 'quoted': '"\\', 'values': [i, [i]]}
+            for i in range(2000)]}
+        payload = [1, element, u'a, "b"', element, 2]
+        serialized = Json.serialize(payload)
+
+        decoder = Json.decoder
+        calls = []
+        class CountingDecoder(object):
+            def raw_decode(self, buffer, offset):
+                calls.append(offset)
+                return decoder.raw_decode(buffer, offset)
+
+        Json.decoder = CountingDecoder()
+        try:
+            for chunksize in (7, 256):
+                del calls[:]
+                stream = Json.unserialize_stream(StringIO(serialized), chunksize)
+                self.assertEqual(list(stream), payload)
+                self.assertLessEqual(len(calls), 2 * len(payload))
+        finally:
+            Json.decoder = decoder
+
+        stream = Json.unserialize_stream(StringIO(serialized[:-20]), 256)
+        self.assertEqual(next(stream), 1)
+        self.assertEqual(next(stream), element)
 
 class TestStructuredText(TestCase):
     def assert_correct(self, pairs):
@@ -73,6 +377,19 @@ class TestStructuredText(TestCase):
             (r'\\', r'\\'),
             (r'\\b', r'\\b'),
         ])
+        self.assertEqual(StructuredText.unserialize('[1,a\[b\]]', True), [1, 'a[b]'])
+        self.assertEqual(StructuredText.unserialize('{a\{:1}'), {'a{': '1'})
+
+    def test_deeply_nested_structures(self):
+        depth = 5000
+        value = StructuredText.unserialize('{a:' * depth + '[1]' + '}' * depth, True)
+        for i in range(depth):
+            value = value['a']
+        self.assertEqual(value, [1])
+
+    def test_invalid_structures(self):
+        for invalid in ('[', '{a:1', '[1]]', '[1]x', '{a}', '{a:1,}', '[a[1]]', '[a}]', '[a\\b]'):
+            self.assertRaises(ValueError, StructuredText.unserialize, invalid)
 
 SINGLE_DICT = """a: 1
 b: true
@@ -162,6 +479,21 @@ class TestYaml(TestCase):
 
         self.assert_serializes((1, 2, 3), SINGLE_LIST)
 
+    def test_nested_blocks(self):
+        self.assert_serializes({'a': [[{'b': 'x\ny', 'c': [1, 2]}], 'text'], 'd': {'e': {}}},
+            'a:\n  - - b: |\n        x\n        y\n      c: [1, 2]\n  - text\nd:\n  e: {}\n')
+
+    def test_loading(self):
+        self.assertEqual(Yaml.unserialize(DICT_WITHIN_LIST), [{'a': 1, 'b': True}, {'a': 2, 'b': False}])
+        self.assertEqual(Yaml.read(StringIO(SINGLE_DICT), format='yaml'),
+            {'a': 1, 'b': True, 'c': 'something'})
+        self.assertRaises(yaml.YAMLError, Yaml.unserialize, '!!python/object/apply:os.getcwd []')
+
+    def test_streaming(self):
+        stream = Yaml.unserialize_stream(StringIO('\n---\n'.join([SINGLE_DICT, SINGLE_LIST, 'a'])))
+        self.assertEqual(next(stream), {'a': 1, 'b': True, 'c': 'something'})
+        self.assertEqual(list(stream), [[1, 2, 3], 'a'])
+
 class TestUrlEncoded(TestCase):
     def assert_correct(self, pairs):
         for unserialized, serialized in pairs:
@@ -252,3 +584,30 @@ class TestXml(TestCase):
         ])
 
         self.assert_serializes((1, 2, 3), '<root><_>1</_><_>2</_><_>3</_></root>')
+
+    def test_streaming(self):
+        items = [{'a': 1, 'b': [True, False]}, [], 2.5, {'c': None}]
+        for path, value in ((None, items), ('a.b', {'a': {'b': items, 'c': 'x'}, 'd': [1]})):
+            stream = Xml.unserialize_stream(StringIO(Xml.serialize(value)), path)
+            self.assertEqual(list(stream), items)
+
+        self.assertEqual(Xml.read(StringIO(Xml.serialize(items)), format='xml'), items)
+
+        field = Sequence(Structure({'a': Integer(), 'b': Sequence(Boolean())}))
+        stream = field.unserialize_stream(StringIO(Xml.serialize(items)), 'xml')
+        self.assertEqual(next(stream), items[0])
+        self.assertRaises(InvalidTypeError, next, stream)
+
+    def test_streaming_serialization(self):
+        self.assert_serializes(OrderedDict([('b', 1), ('a', u'\xe9 & <')]),
+            '<root><b>1</b><a>&#233; &amp; &lt;</a></root>')
+
+        value = {'a': [1, {'b': None}], 'c': {}}
+        for buffersize in (1, 1024):
+            stream = StringIO()
+            Xml.serialize_stream(value, stream, 'doc', False, buffersize)
+            self.assertEqual(stream.getvalue(), Xml.serialize(value, 'doc', False))
+
+        stream = StringIO()
+        Structure({'a': Sequence(Field()), 'c': Map(Integer())}).write(stream, value, 'xml')
+        self.assertEqual(stream.getvalue(), Xml.serialize(value))